@@ -19,6 +19,13 @@ import data_collection_vehicle_remote.util.no_rendering_package.no_rendering_key
 import data_collection_vehicle_remote.util.no_rendering_package.no_rendering_core as core_util
 # from data_collection_vehicle_remote.util.blueprintAttribute import TargetActorAttr
 from data_collection_vehicle_remote.util.VehicleRouteManager import VehicleRouteManager
+from data_collection_vehicle_remote.util.Sensors import SensorManager
+from data_collection_vehicle_remote.util.Sensors import GnssSensor
+from data_collection_vehicle_remote.util.Sensors import IMUSensor
+from data_collection_vehicle_remote.util.sensor_package.sensor_sync import SynchronousDriver
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_scheduler import LoopScheduler
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_scheduler import PACING_SLEEP
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_scheduler import PACING_TICK
 
 import argparse
 import random
@@ -55,6 +62,9 @@ except ImportError:
 
 import data_collection_vehicle_remote.util.no_rendering_package.no_rendering_util as no_rendering_util
 
+# --sensors 이름 -> SensorManager 센서 index
+SENSOR_INDEX = {'rgb': 0, 'depth': 1, 'lidar': 2, 'segmentation': 3, 'dvs': 4}
+
 
 def main():
     """Parses the arguments received from commandline and runs the game loop"""
@@ -108,27 +118,82 @@ def main():
         '--show-spawn-points',
         action='store_true',
         help='show recommended spawn points')
+    argparser.add_argument(
+        '--headless',
+        action='store_true',
+        help='run without window, HUD and input (route, sensors and recording only)')
+    argparser.add_argument(
+        '--sensors',
+        metavar='NAMES',
+        default='',
+        help='comma separated sensors to attach (%s)' % ', '.join(sorted(SENSOR_INDEX, key=SENSOR_INDEX.get)))
+    argparser.add_argument(
+        '--record',
+        action='store_true',
+        help='start recording the sensors immediately')
+    argparser.add_argument(
+        '--sync',
+        action='store_true',
+        help='step the world in synchronous mode and wait for every sensor frame')
+    argparser.add_argument(
+        '--fixed-delta',
+        metavar='SECONDS',
+        default=0.05,
+        type=float,
+        help='simulation step in synchronous mode (default: 0.05)')
+    argparser.add_argument(
+        '--fps',
+        metavar='N',
+        default=20.0,
+        type=float,
+        help='map/HUD render rate (default: 20)')
+    argparser.add_argument(
+        '--route-rate',
+        metavar='N',
+        default=20.0,
+        type=float,
+        help='route control rate in asynchronous mode (default: 20)')
+    argparser.add_argument(
+        '--pacing',
+        choices=[PACING_SLEEP, PACING_TICK],
+        default=PACING_SLEEP,
+        help='loop pacing: precise sleep or wake on server ticks (default: sleep)')
 
     args = argparser.parse_args()
     args.width, args.height = [int(x) for x in args.res.split('x')]
 
+    sensor_names = [x.strip() for x in args.sensors.split(',') if x.strip()]
+    for name in sensor_names:
+        if name not in SENSOR_INDEX:
+            argparser.error('unknown sensor %s' % name)
+
+    target = None
+    rendering_world = None
+    sensor_manager = None
+    geo_sensors = []
+    driver = None
+    scheduler = None
     try:
+        if args.headless:
+            # 창 없이 실행, 센서 surface 등 pygame 기능은 dummy 드라이버로 동작
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         # Init Pygame
         pygame.init()
 
-        display = pygame.display.set_mode(
-            (args.width, args.height),
-            pygame.HWSURFACE | pygame.DOUBLEBUF)
+        if not args.headless:
+            display = pygame.display.set_mode(
+                (args.width, args.height),
+                pygame.HWSURFACE | pygame.DOUBLEBUF)
 
-        # Place a title to game window
-        pygame.display.set_caption("pygame_set_caption")
-        # Show loading screen
-        font = pygame.font.SysFont('Arial', 20)
-        # font = pygame.font.Font(pygame.font.get_default_font(), 20)
-        text_surface = font.render('show_loading_text', True, no_rendering_util.COLOR_WHITE)
-        display.blit(text_surface, text_surface.get_rect(center=(args.width / 2, args.height / 2)))
+            # Place a title to game window
+            pygame.display.set_caption("pygame_set_caption")
+            # Show loading screen
+            font = pygame.font.SysFont('Arial', 20)
+            # font = pygame.font.Font(pygame.font.get_default_font(), 20)
+            text_surface = font.render('show_loading_text', True, no_rendering_util.COLOR_WHITE)
+            display.blit(text_surface, text_surface.get_rect(center=(args.width / 2, args.height / 2)))
 
-        pygame.display.flip()
+            pygame.display.flip()
 
         # Carla init
         client = carla.Client(args.host, 2000)
@@ -147,30 +212,61 @@ def main():
         # blueprint.set_attribute('role_name', target_actor_attr.remote_false)
         blueprint.set_attribute('role_name', "target")
         target = world.try_spawn_actor(blueprint, spawnpoint)
-        # modules init
-        input_control = key_util.InputControl("input control title", world, map)
-        hud = hud_util.HUD_Main("hud title", args.width, args.height)
-        rendering_world = core_util.World(client, target, "Simulator Info", args, timeout=2.0)
 
         ### 경로추적 생성.
         start_POI = map.get_waypoint(spawnpoint.location)
         routeManager = VehicleRouteManager(world, map, target, 20, start_POI)
 
-        # modules start
-        input_control.start(hud, rendering_world)
-        print("system : check input_control")
-        hud.start()
-        print("system : check hud")
-        rendering_world.start(hud, input_control)
-        print("system : check rendering_world")
+        if not args.headless:
+            # modules init
+            input_control = key_util.InputControl("input control title", world, map)
+            hud = hud_util.HUD_Main("hud title", args.width, args.height)
+            rendering_world = core_util.World(client, target, "Simulator Info", args, timeout=2.0)
+
+            # modules start
+            input_control.start(hud, rendering_world)
+            print("system : check input_control")
+            hud.start()
+            print("system : check hud")
+            rendering_world.start(hud, input_control)
+            print("system : check rendering_world")
+        elif args.no_rendering:
+            settings = world.get_settings()
+            settings.no_rendering_mode = True
+            world.apply_settings(settings)
+
+        ### 센서 생성 및 녹화
+        if sensor_names or args.record:
+            sensor_manager = SensorManager(world, target, args, client=client)
+            sensor_manager.set_preview(not args.headless)
+            sensor_manager.set_manifest(True, routeManager.agent.vehicle)
+            sensor_manager.set_sensors([(name, SENSOR_INDEX[name]) for name in sensor_names])
+            if rendering_world is not None:
+                rendering_world.sensor_metrics = sensor_manager.metrics
+                sensor_manager.set_telemetry([rendering_world.gnss, rendering_world.imu])
+            else:
+                geo_sensors = [GnssSensor(target), IMUSensor(target)]
+                sensor_manager.set_telemetry(geo_sensors)
+            if args.record:
+                sensor_manager.recording()
+            print("system : check sensors")
+
+        if args.sync:
+            # 서버 tick, 경로 제어, 센서 프레임 수집을 한 단계로 진행
+            driver = SynchronousDriver(world, sensor_manager, routeManager, target, args.fixed_delta,
+                                       traffic_manager=client.get_trafficmanager())
+            driver.start()
+            print("system : check synchronous mode")
 
         # Game loop
         clock = pygame.time.Clock()
-        while True:
-            clock.tick_busy_loop(20)
 
-            # Tick all modules
+        def tick_route():
             routeManager.tick(target)
+
+        def tick_render():
+            clock.tick()
+            # Tick all modules
             rendering_world.tick(clock, routeManager)
             hud.tick(clock)
             input_control.tick(clock, routeManager)
@@ -182,11 +278,35 @@ def main():
             input_control.render(display)
             pygame.display.flip()
 
+        # 단계별 주기로 실행 (busy wait 없이 대기하여 센서 콜백 스레드에 CPU 양보)
+        scheduler = LoopScheduler(world, args.pacing)
+        if driver is None:
+            scheduler.add_stage('route', tick_route, args.route_rate)
+        if not args.headless:
+            scheduler.add_stage('render', tick_render, args.fps)
+        while True:
+            if driver is not None:
+                # 동기 모드에서는 world.tick() 이 속도를 결정
+                driver.step()
+                scheduler.run_once(block=False)
+            else:
+                scheduler.run_once()
+
     except KeyboardInterrupt:
         print('\nCancelled by user. Bye!')
     finally:
-        target.destroy()
-        rendering_world.destroy()
+        if scheduler is not None:
+            scheduler.destroy()
+        if driver is not None:
+            driver.stop()
+        if sensor_manager is not None:
+            sensor_manager.destroy()
+        for sensor in geo_sensors:
+            sensor.destroy()
+        if target is not None:
+            target.destroy()
+        if rendering_world is not None:
+            rendering_world.destroy()
         return
 
 
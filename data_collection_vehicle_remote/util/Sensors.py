@@ -2,18 +2,56 @@ import glob
 import os
 import sys
 import weakref
+import collections
 import numpy as np
 import math
 
-try:
-    import pygame
-except ImportError:
-    raise RuntimeError('cannot import pygame, make sure pygame package is installed')
-
 import carla
 from carla import ColorConverter as cc
 import random
 
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import FrameData
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import FrameWriter
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_IMAGE
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_LIDAR
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_RADAR
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_DEPTH
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_SEGMENTATION
+from data_collection_vehicle_remote.util.sensor_package.sensor_camera import DepthDecoder
+from data_collection_vehicle_remote.util.sensor_package.sensor_camera import SegmentationDecoder
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_DVS
+from data_collection_vehicle_remote.util.sensor_package.sensor_dvs import DvsAccumulator
+from data_collection_vehicle_remote.util.sensor_package.sensor_dvs import DvsStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_dvs import dvs_events
+from data_collection_vehicle_remote.util.sensor_package.sensor_radar import RadarDrawer
+from data_collection_vehicle_remote.util.sensor_package.sensor_radar import radar_points
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import ArrayStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_lidar import LidarStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_lidar import BevRasterizer
+from data_collection_vehicle_remote.util.sensor_package.sensor_lidar import LidarDownsampler
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_BEV
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import DEFAULT_SHARD_SIZE
+from data_collection_vehicle_remote.util.sensor_package.sensor_bundler import FrameBundler
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import DROP_OLDEST
+from data_collection_vehicle_remote.util.sensor_package.sensor_preview import PreviewSurface
+from data_collection_vehicle_remote.util.sensor_package.sensor_preview import LidarPreview
+from data_collection_vehicle_remote.util.sensor_package.sensor_worker import SensorWorker
+from data_collection_vehicle_remote.util.sensor_package.sensor_rig import RigSpawner
+from data_collection_vehicle_remote.util.sensor_package.sensor_encoder import ImageEncoder
+from data_collection_vehicle_remote.util.sensor_package.sensor_encoder import ImageStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_manifest import SessionManifest
+from data_collection_vehicle_remote.util.sensor_package.sensor_manifest import PoseRecorder
+from data_collection_vehicle_remote.util.sensor_package.sensor_manifest import MANIFEST_NAME
+from data_collection_vehicle_remote.util.sensor_package.sensor_metrics import SensorMetrics
+from data_collection_vehicle_remote.util.sensor_package.sensor_rate import RateController
+from data_collection_vehicle_remote.util.sensor_package.sensor_storage import StorageManager
+from data_collection_vehicle_remote.util.sensor_package.sensor_storage import STORAGE_PAUSE
+from data_collection_vehicle_remote.util.sensor_package.sensor_storage import DEFAULT_MIN_FREE
+from data_collection_vehicle_remote.util.sensor_package.sensor_telemetry import TelemetryLog
+from data_collection_vehicle_remote.util.sensor_package.sensor_telemetry import IMU_COLUMNS
+from data_collection_vehicle_remote.util.sensor_package.sensor_telemetry import GNSS_COLUMNS
+from data_collection_vehicle_remote.util.sensor_package.sensor_sync import FrameSync
+
 # @todo 센서 및 설정정보 리스트, 가능하면 아래 배열 형식을 따를 수 있도록해야함.
 sensor_camera_rgb = [['sensor.camera.rgb', cc.Raw, 'Camera RGB', 'a-0', {}],
                      ['sensor.camera.rgb', cc.Raw, 'Camera RGB Distorted', 'a-0',
@@ -66,6 +104,13 @@ sensor_radar = [
     }]
 ]
 
+# 센서 index -> (센서 설정 테이블, 저장 id 컬럼), SensorManager._sensor_spec 과 같은 index (select_sensor 0)
+sensor_streams = {0: (sensor_camera_rgb, 3),
+                  1: (sensor_camera_depth, 3),
+                  2: (sensor_lidar, 1),
+                  3: (sensor_camera_segmentation, 3),
+                  4: (sensor_camera_dvs, 3)}
+
 sensor_other = [['sensor.other.collision'],
                 ['sensor.other.radar'],
                 ['sensor.other.gnss'],
@@ -92,17 +137,13 @@ transforms = [
 
 
 class Camera_Rgb:
-    def __init__(self, world, target, config, select_sensor=0, tick=0.0):
-        self.world = world
-        self.bp_library = world.get_blueprint_library()
-        self.target = target
-        self.sensorActor = None
-        self.recording = False
-        self.surface = None
-        bp_library = world.get_blueprint_library()
-        # 센서 블루프린트 id를 불러옴.
+    # 스폰 위치
+    transform = transforms[0]
+
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
+        """센서 테이블 설정을 적용한 블루프린트 (RigSpawner 에서 일괄 스폰할 때도 사용)"""
         item = sensor_camera_rgb[select_sensor]
-        ###센서 초기화.
         bp = bp_library.find(item[0])
         bp.set_attribute('image_size_x', str(config.width))
         bp.set_attribute('image_size_y', str(config.height))
@@ -114,14 +155,41 @@ class Camera_Rgb:
         #     bp.set_attribute('gamma', str(gamma_correction))
         for attr_name, attr_value in item[4].items():
             bp.set_attribute(attr_name, attr_value)
+        return bp
 
-        sensor = self.world.spawn_actor(bp, transforms[0], attach_to=self.target)
+    def __init__(self, world, target, config, select_sensor=0, tick=0.0, preview=True, worker=None, actor=None,
+                 bp_library=None):
+        self.world = world
+        # 블루프린트 라이브러리는 RigSpawner 등에서 캐시한 것을 넘겨받아 재사용
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
+        self.target = target
+        self.sensorActor = None
+        self.recording = False
+        self.writer = None
+        self.bundler = None
+        self.surface = None
+        # 미리보기 surface (매 프레임 재할당 없이 갱신)
+        self.preview = PreviewSurface(config.width, config.height) if preview else None
+        # 센서 블루프린트 id를 불러옴.
+        item = sensor_camera_rgb[select_sensor]
+        self.sensor_id = item[3]
+        ###센서 초기화.
+        if actor is None:
+            bp = Camera_Rgb.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Camera_Rgb.transform, attach_to=self.target)
+        sensor = actor
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Rgb._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Rgb._parse_image(weak_self, image, item[1], item[3])
+        # worker 가 설정된 경우 콜백 스레드는 측정값만 넘기고 처리는 센서별 worker 스레드에서 수행
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
@@ -131,24 +199,21 @@ class Camera_Rgb:
         self = weak_self()
 
         image.convert(cc)
-        # Camera_Rgb._parse_pygame(self, image, cc)
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-        self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
-
-        if self.recording:
-            image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
+        Camera_Rgb._parse_pygame(self, image, cc)
+
+        if self.bundler is not None:
+            self.bundler.add(FrameData.from_image(image, id))
+        elif self.recording:
+            if self.writer is not None:
+                self.writer.submit(FrameData.from_image(image, id))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
 
     @staticmethod
     def _parse_pygame(self, image, cc):
-        # pygame set
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-        self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+        # pygame set (미리 할당된 버퍼와 surface 재사용)
+        if self.preview is not None:
+            self.surface = self.preview.blit_bgra(image.raw_data, image.width, image.height)
 
     def render(self, display):
         if self.surface is not None:
@@ -161,17 +226,12 @@ class Camera_Rgb:
 
 
 class Camera_Depth:
-    def __init__(self, world, target, config, select_sensor=0, tick=0.0):
-        self.world = world
-        self.bp_library = world.get_blueprint_library()
-        self.target = target
-        self.sensorActor = None
-        self.recording = False
-        self.surface = None  # <- 2020-08-07추가
-        bp_library = world.get_blueprint_library()
-        ###센서 초기화.
-        item = sensor_camera_depth[select_sensor]
+    # 스폰 위치
+    transform = transforms[0]
 
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
+        item = sensor_camera_depth[select_sensor]
         bp = bp_library.find(item[0])
         bp.set_attribute('image_size_x', str(config.width))
         bp.set_attribute('image_size_y', str(config.height))
@@ -182,33 +242,77 @@ class Camera_Depth:
         #     bp.set_attribute('gamma', str(gamma_correction))
         for attr_name, attr_value in item[4].items():
             bp.set_attribute(attr_name, attr_value)
+        return bp
 
-        sensor = self.world.spawn_actor(bp, transforms[0], attach_to=self.target)
+    def __init__(self, world, target, config, select_sensor=0, tick=0.0, preview=True, record_metric=False,
+                 worker=None, actor=None, bp_library=None):
+        self.world = world
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
+        self.target = target
+        self.sensorActor = None
+        self.recording = False
+        self.writer = None
+        self.bundler = None
+        self.surface = None  # <- 2020-08-07추가
+        # 미리보기 surface (매 프레임 재할당 없이 갱신)
+        self.preview = PreviewSurface(config.width, config.height) if preview else None
+        # raw 버퍼를 float32 거리(m) 로 직접 변환 (image.convert 미사용)
+        self.decoder = DepthDecoder(config.width, config.height)
+        # True 인 경우 변환 이미지 대신 float32 거리(m) 맵을 저장
+        self.record_metric = record_metric
+        ###센서 초기화.
+        item = sensor_camera_depth[select_sensor]
+        self.sensor_id = item[3]
+
+        if actor is None:
+            bp = Camera_Depth.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Camera_Depth.transform, attach_to=self.target)
+        sensor = actor
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Depth._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Depth._parse_image(weak_self, image, item[1], item[3])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
 
     @staticmethod
     def _parse_pygame(self, image, cc):
-        # pygame set
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-        self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+        # pygame set (미리 할당된 버퍼와 surface 재사용), 거리맵에서 회색조 이미지 생성
+        if self.preview is not None:
+            if cc == carla.ColorConverter.Depth:
+                self.decoder.gray_linear()
+                self.surface = self.preview.blit_rgb(self.decoder.gray_rgb())
+            elif cc == carla.ColorConverter.LogarithmicDepth:
+                self.decoder.gray_log()
+                self.surface = self.preview.blit_rgb(self.decoder.gray_rgb())
+            else:
+                self.surface = self.preview.blit_bgra(image.raw_data, image.width, image.height)
 
     @staticmethod
     def _parse_image(weak_self, image, cc, id):
         self = weak_self()
-        image.convert(cc)
+        meters = self.decoder.decode(image.raw_data, image.width, image.height)
         Camera_Depth._parse_pygame(self, image, cc)
-        if self.recording:
+        if self.bundler is None and not self.recording:
+            return
+        if self.record_metric:
+            frame_data = FrameData.from_array(meters, id, image.frame, image.timestamp, kind=KIND_DEPTH)
+        else:
+            image.convert(cc)
+            frame_data = FrameData.from_image(image, id)
+        if self.bundler is not None:
+            self.bundler.add(frame_data)
+        elif self.writer is not None:
+            self.writer.submit(frame_data)
+        else:
             image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
 
     def render(self, display):
@@ -217,17 +321,12 @@ class Camera_Depth:
 
 
 class Camera_Segmentation:
-    def __init__(self, world, target, config, select_sensor=0, tick=0):
-        self.world = world
-        self.bp_library = world.get_blueprint_library()
-        self.target = target
-        self.sensorActor = None
-        self.recording = False
-        self.surface = None  # <- 2020-08-07추가
-        bp_library = world.get_blueprint_library()
-        ###센서 초기화.
-        item = sensor_camera_segmentation[select_sensor]
+    # 스폰 위치
+    transform = transforms[0]
 
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
+        item = sensor_camera_segmentation[select_sensor]
         bp = bp_library.find(item[0])
         bp.set_attribute('image_size_x', str(config.width))
         bp.set_attribute('image_size_y', str(config.height))
@@ -238,34 +337,73 @@ class Camera_Segmentation:
         #     bp.set_attribute('gamma', str(gamma_correction))
         for attr_name, attr_value in item[4].items():
             bp.set_attribute(attr_name, attr_value)
+        return bp
+
+    def __init__(self, world, target, config, select_sensor=0, tick=0, preview=True, record_labels=True,
+                 worker=None, actor=None, bp_library=None):
+        self.world = world
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
+        self.target = target
+        self.sensorActor = None
+        self.recording = False
+        self.writer = None
+        self.bundler = None
+        self.surface = None  # <- 2020-08-07추가
+        # 미리보기 surface (매 프레임 재할당 없이 갱신)
+        self.preview = PreviewSurface(config.width, config.height) if preview else None
+        # raw 버퍼의 클래스 id 를 직접 사용 (image.convert 미사용)
+        self.decoder = SegmentationDecoder(config.width, config.height)
+        # True 인 경우 팔레트 이미지 대신 uint8 라벨 맵을 저장
+        self.record_labels = record_labels
+        ###센서 초기화.
+        item = sensor_camera_segmentation[select_sensor]
+        self.sensor_id = item[3]
 
-        sensor = self.world.spawn_actor(bp, transforms[0], attach_to=self.target)
+        if actor is None:
+            bp = Camera_Segmentation.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Camera_Segmentation.transform, attach_to=self.target)
+        sensor = actor
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Segmentation._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Segmentation._parse_image(weak_self, image, item[1], item[3])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
 
     @staticmethod
     def _parse_pygame(self, image, cc):  # <- 2020-08-07추가
-        # pygame set
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = np.reshape(array, (image.height, image.width, 4))
-
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-        self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+        # pygame set (미리 할당된 버퍼와 surface 재사용), 팔레트는 미리보기에만 적용
+        if self.preview is not None:
+            if cc == carla.ColorConverter.CityScapesPalette:
+                self.surface = self.preview.blit_rgb(self.decoder.colorize())
+            else:
+                self.surface = self.preview.blit_bgra(image.raw_data, image.width, image.height)
 
     @staticmethod
     def _parse_image(weak_self, image, cc, id):  # <- 2020-08-07추가
         self = weak_self()
-        image.convert(cc)
+        labels = self.decoder.decode(image.raw_data, image.width, image.height)
         Camera_Segmentation._parse_pygame(self, image, cc)
-        if self.recording:
+        if self.bundler is None and not self.recording:
+            return
+        if self.record_labels:
+            frame_data = FrameData.from_array(labels, id, image.frame, image.timestamp, kind=KIND_SEGMENTATION)
+        else:
+            image.convert(cc)
+            frame_data = FrameData.from_image(image, id)
+        if self.bundler is not None:
+            self.bundler.add(frame_data)
+        elif self.writer is not None:
+            self.writer.submit(frame_data)
+        else:
             image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
 
     def render(self, display):  # <- 2020-08-07추가
@@ -279,17 +417,12 @@ class Camera_Segmentation:
 
 
 class Camera_Dvs:
-    def __init__(self, world, target, config, select_sensor=0, tick=0.0):
-        self.world = world
-        self.bp_library = world.get_blueprint_library()
-        self.target = target
-        self.sensorActor = None
-        self.recording = False
-        self.surface = None
-        bp_library = world.get_blueprint_library()
-        # 센서 블루프린트 id를 불러옴.
+    # 스폰 위치
+    transform = transforms[0]
+
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
         item = sensor_camera_dvs[select_sensor]
-        ###센서 초기화.
         bp = bp_library.find(item[0])
         bp.set_attribute('image_size_x', str(config.width))
         bp.set_attribute('image_size_y', str(config.height))
@@ -301,40 +434,71 @@ class Camera_Dvs:
         #     bp.set_attribute('gamma', str(gamma_correction))
         for attr_name, attr_value in item[4].items():
             bp.set_attribute(attr_name, attr_value)
+        return bp
 
-        sensor = self.world.spawn_actor(bp, transforms[0], attach_to=self.target)
+    def __init__(self, world, target, config, select_sensor=0, tick=0.0, preview=True, window=0.05,
+                 capacity=1 << 20, worker=None, actor=None, bp_library=None):
+        self.world = world
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
+        self.target = target
+        self.sensorActor = None
+        self.recording = False
+        self.writer = None
+        self.bundler = None
+        self.surface = None
+        # 미리보기 surface (매 프레임 재할당 없이 갱신)
+        self.preview = PreviewSurface(config.width, config.height) if preview else None
+        # 최근 이벤트 링버퍼, window 초 동안의 이벤트를 극성별 히스토그램으로 누적
+        self.accumulator = DvsAccumulator(config.width, config.height, window, capacity)
+        # 센서 블루프린트 id를 불러옴.
+        item = sensor_camera_dvs[select_sensor]
+        self.sensor_id = item[3]
+        ###센서 초기화.
+        if actor is None:
+            bp = Camera_Dvs.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Camera_Dvs.transform, attach_to=self.target)
+        sensor = actor
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Dvs._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Dvs._parse_image(weak_self, image, item[1], item[3])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
 
+    def set_window(self, window):
+        # 미리보기 누적 시간 (초)
+        self.accumulator.window = window
+
     @staticmethod
     def _parse_image(weak_self, image, cc, id):
         self = weak_self()
 
-        dvs_events = np.frombuffer(image.raw_data, dtype=np.dtype([
-            ('x', np.uint16), ('y', np.uint16), ('t', np.int64), ('pol', np.bool)]))
-        dvs_img = np.zeros((image.height, image.width, 3), dtype=np.uint8)
-        # Blue is positive, red is negative
-        dvs_img[dvs_events[:]['y'], dvs_events[:]['x'], dvs_events[:]['pol'] * 2] = 255
-        self.surface = pygame.surfarray.make_surface(dvs_img.swapaxes(0, 1))
+        events = dvs_events(image)
+        self.accumulator.push(events)
+        Camera_Dvs._parse_pygame(self, image, cc)
 
-        if self.recording:
-            image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
+        if self.bundler is not None:
+            self.bundler.add(FrameData.from_array(events, id, image.frame, image.timestamp, kind=KIND_DVS))
+        elif self.recording:
+            if self.writer is not None:
+                self.writer.submit(FrameData.from_array(events, id, image.frame, image.timestamp, kind=KIND_DVS))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
 
     @staticmethod
     def _parse_pygame(self, image, cc):
-        # pygame set
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-        self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+        # pygame set, Blue is positive, red is negative
+        if self.preview is not None:
+            self.accumulator.accumulate()
+            self.surface = self.preview.blit_rgb(self.accumulator.render())
 
     def render(self, display):
         if self.surface is not None:
@@ -342,58 +506,94 @@ class Camera_Dvs:
 
 
 class Sensor_Lider:
-    def __init__(self, world, target, config, select_sensor=0):
+    # 스폰 위치
+    transform = transforms[2]
+
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
+        item = sensor_lidar[select_sensor]
+        bp = bp_library.find(item[0])
+        for attr_name, attr_value in item[2].items():
+            bp.set_attribute(attr_name, attr_value)
+        return bp
+
+    def __init__(self, world, target, config, select_sensor=0, preview=True, bev=None, downsampler=None,
+                 worker=None, actor=None, bp_library=None):
         self.world = world
-        self.bp_library = world.get_blueprint_library()
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
         self.target = target
         self.sensorActor = None
         self.recording = False
+        self.writer = None
+        self.bundler = None
         self.surface = None  # <- 2020-08-07추가
         self.dim = (config.width, config.height)
-        bp_library = world.get_blueprint_library()
         ###센서 초기화.
         item = sensor_lidar[select_sensor]
-        bp = bp_library.find(item[0])
-        for attr_name, attr_value in item[2].items():
-            bp.set_attribute(attr_name, attr_value)
-            if attr_name == str('range'):
-                print("check=====")
-                self.lidar_range = float(attr_value)
-
-        sensor = self.world.spawn_actor(bp, transforms[2], attach_to=self.target)
+        self.sensor_id = item[1]
+        self.lidar_range = float(item[2]['range'])
+        # 미리보기 이미지 (매 프레임 재할당 없이 갱신)
+        self.preview = LidarPreview(self.dim[0], self.dim[1], self.lidar_range) if preview else None
+        # BevRasterizer 가 설정된 경우 매 스윕의 BEV 격자도 함께 저장
+        self.bev = bev
+        # LidarDownsampler 가 설정된 경우 다운샘플링한 포인트를 저장
+        self.downsampler = downsampler
+
+        if actor is None:
+            bp = Sensor_Lider.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Sensor_Lider.transform, attach_to=self.target)
+        sensor = actor
         print("센서 생성 id : ", sensor.id)
         weak_self = weakref.ref(self)
-        sensor.listen(lambda point_cloud: Sensor_Lider._parse_image(weak_self, point_cloud, item[1]))
+        callback = lambda point_cloud: Sensor_Lider._parse_image(weak_self, point_cloud, item[1])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
 
     @staticmethod
-    def _parse_pygame(self, image):  # <- 2020-08-07추가
-        # pygame set
+    def _points(image):
         points = np.frombuffer(image.raw_data, dtype=np.dtype('f4'))
-        points = np.reshape(points, (int(points.shape[0] / 3), 3))
-        lidar_data = np.array(points[:, :2])
-        lidar_data *= min(self.dim) / (2.0 * self.lidar_range)
-        lidar_data += (0.5 * self.dim[0], 0.5 * self.dim[1])
-        lidar_data = np.fabs(lidar_data)  # pylint: disable=E1111
-        lidar_data = lidar_data.astype(np.int32)
-        lidar_data = np.reshape(lidar_data, (-1, 2))
-        lidar_img_size = (self.dim[0], self.dim[1], 3)
-        lidar_img = np.zeros((lidar_img_size), dtype=np.uint8)
-        lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
-        self.surface = pygame.surfarray.make_surface(lidar_img)
+        # 빈 스윕은 (0, 3), 채널 수는 포인트가 있을 때만 버퍼 크기에서 계산
+        if len(image) == 0:
+            return points[:0].reshape((0, 3))
+        return np.reshape(points, (len(image), -1))
+
+    @staticmethod
+    def _frame_data(self, image, id):
+        if self.downsampler is None:
+            return FrameData.from_lidar(image, id)
+        points = self.downsampler(Sensor_Lider._points(image))
+        return FrameData.from_array(points, id, image.frame, image.timestamp, kind=KIND_LIDAR)
+
+    @staticmethod
+    def _parse_pygame(self, image):  # <- 2020-08-07추가
+        # pygame set (미리 할당된 버퍼와 surface 재사용)
+        if self.preview is not None:
+            self.surface = self.preview.blit_points(Sensor_Lider._points(image))
 
     @staticmethod
     def _parse_image(weak_self, image, id):  # <- 2020-08-07추가
         self = weak_self()
         Sensor_Lider._parse_pygame(self, image)
-        if self.recording:
-            image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
+        if self.bundler is not None:
+            self.bundler.add(Sensor_Lider._frame_data(self, image, id))
+        elif self.recording:
+            if self.writer is not None:
+                self.writer.submit(Sensor_Lider._frame_data(self, image, id))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%08d' % image.frame)
+        if self.bev is not None and self.recording and self.writer is not None:
+            bev = self.bev.rasterize(Sensor_Lider._points(image))
+            self.writer.submit(FrameData.from_array(bev, id, image.frame, image.timestamp, kind=KIND_BEV))
 
     def render(self, display):  # <- 2020-08-07추가
         if self.surface is not None:
@@ -401,27 +601,41 @@ class Sensor_Lider:
 
 
 class Sensor_Radar:
-    def __init__(self, world, target, config, select_sensor=0):
+    # 스폰 위치
+    transform = transforms[3]
+
+    @staticmethod
+    def blueprint(bp_library, config, select_sensor=0):
+        item = sensor_radar[select_sensor]
+        bp = bp_library.find(item[0])
+        # print("test : ", bp)
+        for attr_name, attr_value in item[2].items():
+            bp.set_attribute(attr_name, attr_value)
+        return bp
+
+    def __init__(self, world, target, config, select_sensor=0, draw_interval=0.1, draw_max_points=200, actor=None,
+                 bp_library=None):
         self.world = world
         self.debug = world.debug
-        self.bp_library = world.get_blueprint_library()
+        self.bp_library = bp_library if bp_library is not None else world.get_blueprint_library()
         self.target = target
         self.sensorActor = None
         self.recording = False
+        self.writer = None
+        self.bundler = None
         self.surface = None  # <- 2020-08-07추가
         self.dim = (config.width, config.height)
-        bp_library = world.get_blueprint_library()
         ###센서 초기화.
         item = sensor_radar[select_sensor]
-        bp = bp_library.find(item[0])
-        # print("test : ", bp)
-        for attr_name, attr_value in item[2].items():
-            bp.set_attribute(attr_name, attr_value)
-            if attr_name == str('range'):
-                print("check=====")
-                self.velocity_range = float(attr_value)
-
-        sensor = self.world.spawn_actor(bp, transforms[3], attach_to=self.target)
+        self.sensor_id = item[1] if item[1] else 'radar'
+        self.velocity_range = float(item[2]['range'])
+        # 디버그 포인트는 RPC 이므로 주기와 개수를 제한하여 그림
+        self.drawer = RadarDrawer(self.debug, self.velocity_range, draw_interval, draw_max_points)
+
+        if actor is None:
+            bp = Sensor_Radar.blueprint(self.bp_library, config, select_sensor)
+            actor = self.world.spawn_actor(bp, Sensor_Radar.transform, attach_to=self.target)
+        sensor = actor
         print("센서 생성 id : ", sensor.id)
         weak_self = weakref.ref(self)
 
@@ -430,6 +644,13 @@ class Sensor_Radar:
 
         self.sensorActor = sensor  # 설정된 센서 저장.
 
+    def set_recording(self, check=False, writer=None):
+        self.recording = check
+        self.writer = writer
+
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
+
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
 
@@ -440,37 +661,15 @@ class Sensor_Radar:
         if not self:
             # print("radar is not self")
             return
-        # To get a numpy [[vel, altitude, azimuth, depth],...[,,,]]:
-        # points = np.frombuffer(radar_data.raw_data, dtype=np.dtype('f4'))
-        # points = np.reshape(points, (len(radar_data), 4))
-
-        current_rot = radar_data.transform.rotation
-        for detect in radar_data:
-            azi = math.degrees(detect.azimuth)
-            alt = math.degrees(detect.altitude)
-            # The 0.25 adjusts a bit the distance so the dots can
-            # be properly seen
-            fw_vec = carla.Vector3D(x=detect.depth - 0.25)
-            carla.Transform(
-                carla.Location(),
-                carla.Rotation(
-                    pitch=current_rot.pitch + alt,
-                    yaw=current_rot.yaw + azi,
-                    roll=current_rot.roll)).transform(fw_vec)
-
-            def clamp(min_v, max_v, value):
-                return max(min_v, min(value, max_v))
-
-            norm_velocity = detect.velocity / self.velocity_range  # range [-1, 1]
-            r = int(clamp(0.0, 1.0, 1.0 - norm_velocity) * 255.0)
-            g = int(clamp(0.0, 1.0, 1.0 - abs(norm_velocity)) * 255.0)
-            b = int(abs(clamp(- 1.0, 0.0, - 1.0 - norm_velocity)) * 255.0)
-            self.debug.draw_point(
-                radar_data.transform.location + fw_vec,
-                size=0.075,
-                life_time=0.06,
-                persistent_lines=False,
-                color=carla.Color(r, g, b))
+        # numpy [[vel, altitude, azimuth, depth],...[,,,]]
+        points = radar_points(radar_data)
+        self.drawer.draw(points, radar_data.transform, radar_data.timestamp)
+
+        if self.bundler is not None:
+            self.bundler.add(FrameData.from_array(points, self.sensor_id, radar_data.frame, radar_data.timestamp))
+        elif self.recording and self.writer is not None:
+            self.writer.submit(FrameData.from_array(points, self.sensor_id, radar_data.frame, radar_data.timestamp,
+                                                    kind=KIND_RADAR))
 
 
 # ==============================================================================
@@ -481,6 +680,11 @@ class Sensor_Radar:
 class GnssSensor(object):
     def __init__(self, parent_actor):
         self.sensor = None
+        self.sensor_id = 'gnss'
+        self.telemetry_columns = GNSS_COLUMNS
+        self.bundler = None
+        # 전체 샘플 기록 (sensor_telemetry.TelemetryLog)
+        self.telemetry = None
         self._parent = parent_actor
         self.lat = 0.0
         self.lon = 0.0
@@ -492,6 +696,12 @@ class GnssSensor(object):
         weak_self = weakref.ref(self)
         self.sensor.listen(lambda event: GnssSensor._on_gnss_event(weak_self, event))
 
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
+
+    def set_telemetry(self, telemetry=None):
+        self.telemetry = telemetry
+
     def destroy(self):  # target 센서 제거.
         self.sensor.destroy()
 
@@ -502,6 +712,11 @@ class GnssSensor(object):
             return
         self.lat = event.latitude
         self.lon = event.longitude
+        if self.telemetry is not None:
+            self.telemetry.append(event.frame, event.timestamp, (event.latitude, event.longitude, event.altitude))
+        if self.bundler is not None:
+            sample = np.array((event.latitude, event.longitude, event.altitude), dtype=np.float64)
+            self.bundler.add(FrameData.from_array(sample, self.sensor_id, event.frame, event.timestamp))
 
 
 # ==============================================================================
@@ -512,6 +727,10 @@ class GnssSensor(object):
 class IMUSensor(object):
     def __init__(self, parent_actor):
         self.sensor = None
+        self.sensor_id = 'imu'
+        self.telemetry_columns = IMU_COLUMNS
+        self.bundler = None
+        self.telemetry = None
         self._parent = parent_actor
         self.accelerometer = (0.0, 0.0, 0.0)
         self.gyroscope = (0.0, 0.0, 0.0)
@@ -526,6 +745,12 @@ class IMUSensor(object):
         self.sensor.listen(
             lambda sensor_data: IMUSensor._IMU_callback(weak_self, sensor_data))
 
+    def set_bundler(self, bundler=None):
+        self.bundler = bundler
+
+    def set_telemetry(self, telemetry=None):
+        self.telemetry = telemetry
+
     def destroy(self):  # target 센서 제거.
         self.sensor.destroy()
 
@@ -534,6 +759,15 @@ class IMUSensor(object):
         self = weak_self()
         if not self:
             return
+        # [ax, ay, az, gx, gy, gz, compass] (m/s^2, rad/s, rad)
+        acc = sensor_data.accelerometer
+        gyro = sensor_data.gyroscope
+        values = (acc.x, acc.y, acc.z, gyro.x, gyro.y, gyro.z, sensor_data.compass)
+        if self.telemetry is not None:
+            self.telemetry.append(sensor_data.frame, sensor_data.timestamp, values)
+        if self.bundler is not None:
+            sample = np.array(values, dtype=np.float64)
+            self.bundler.add(FrameData.from_array(sample, self.sensor_id, sensor_data.frame, sensor_data.timestamp))
         limits = (-99.9, 99.9)
         self.accelerometer = (
             max(limits[0], min(limits[1], sensor_data.accelerometer.x)),
@@ -551,67 +785,498 @@ class IMUSensor(object):
 # ==============================================================================
 
 class SensorManager(object):
-    def __init__(self, world, target, args):
+    """
+    여러 센서를 이름으로 관리하며 함께 시작/녹화/종료함 (한번의 주행으로 RGB, depth, lidar 등을 동시에 수집).
+    센서마다 SensorWorker 스레드를 두어 디코딩, 미리보기, 저장 요청을 센서별로 처리함.
+    """
+
+    def __init__(self, world, target, args, writer_workers=2, writer_processes=0, buffer_capacity=64,
+                 buffer_policy=DROP_OLDEST, sensor_workers=True, client=None):
         self.world = world
         self.target = target
         self.args = args
-        self.sensor = None
+        # client 가 있는 경우 센서 구성을 batch 요청으로 생성/제거 (set_sensors)
+        self.spawner = RigSpawner(client, world) if client is not None else None
+        self.bp_library = self.spawner.bp_library if self.spawner is not None else world.get_blueprint_library()
+        # {이름: 센서}, 추가한 순서 유지
+        self.sensors = collections.OrderedDict()
+        self.workers = {}
+        # False 인 경우 CARLA 콜백 스레드에서 직접 처리
+        self.sensor_workers = sensor_workers
         self.recoding_check = False
         self.radar_sensor = None
-        # self.sensor_a0 = Camera_Rgb(world, target, args, select_sensor=0, tick=0.0)
-        # self.sensor_b0 = Camera_Depth(world, target, args, select_sensor=0, tick=0.0)
-        # self.sensor_b1 = Camera_Depth(world, target, args, select_sensor=1, tick=0.0)
-        # self.sensor_b2 = Camera_Depth(world, target, args, select_sensor=2, tick=0.0)
-        # self.sensor_c0 = Camera_Segmentation(world, target, args, select_sensor=0, tick=0.0)
-        # self.sensor_d0 = Sensor_Lider(world, target, args, select_sensor=1)
-        # self.sensor_list = [self.sensor_a0, self.sensor_b0, self.sensor_b1, self.sensor_b2, self.sensor_c0,
-        #                     self.sensor_d0]
+        # 센서 데이터 저장은 콜백 스레드가 아닌 writer 스레드(프로세스)에서 수행
+        self.writer = FrameWriter(root='sensor', workers=writer_workers, capacity=buffer_capacity,
+                                  policy=buffer_policy, processes=writer_processes)
+        # 프레임 동기화 번들 (set_bundling 참고)
+        self.bundler = None
+        self.bundle_check = False
+        self.bundle_sensors = []
+        self.bundle_timeout = 1.0
+        # 녹화 중 전체 샘플을 컬럼 파일로 기록할 센서 (GnssSensor, IMUSensor, set_telemetry 참고)
+        self.telemetry_sensors = []
+        # 라이다와 카메라 이미지는 기본적으로 샤드(세그먼트) 파일에 기록
+        self.set_lidar_store()
+        self.set_image_store()
+        self.writer.register_store(KIND_RADAR, lambda root, sensor_id: ArrayStore(root, sensor_id, 'radar'))
+        self.writer.register_store(KIND_DEPTH, lambda root, sensor_id: ArrayStore(root, sensor_id, 'depth'))
+        self.writer.register_store(
+            KIND_SEGMENTATION, lambda root, sensor_id: ArrayStore(root, sensor_id, 'segmentation'))
+        self.writer.register_store(KIND_DVS, lambda root, sensor_id: DvsStore(root, sensor_id))
+        self.writer.register_store(KIND_BEV, lambda root, sensor_id: ArrayStore(root, sensor_id, 'bev'))
+        # 라이다 BEV 격자 저장 설정 (None 인 경우 저장하지 않음)
+        self.lidar_bev = None
+        # 라이다 다운샘플링 설정 (None 인 경우 전체 포인트 저장)
+        self.lidar_downsampler = None
+        # DVS 미리보기 누적 시간 (초)
+        self.dvs_window = 0.05
+        # True 인 경우 depth 카메라는 float32 거리(m) 맵을 저장
+        self.depth_metric = False
+        # False 인 경우 센서 미리보기 surface 를 만들지 않음 (화면 없는 수집 서버)
+        self.preview = True
+        # 녹화 세션 인덱스 (set_manifest 참고)
+        self.manifest_check = True
+        self.manifest_vehicle = None
+        self.manifest = None
+        self.pose_recorder = None
+        # 센서별 처리율, 지연시간, 큐 깊이, 손실, 기록 속도 (metrics_snapshot 참고)
+        self.metrics = SensorMetrics(self.writer, self.workers)
+        self._metrics_tick = world.on_tick(self.metrics.on_world_tick)
+        # 센서별 처리 완료 프레임 (동기 모드 주행, sensor_sync.SynchronousDriver 참고)
+        self.frame_sync = FrameSync()
+        # 녹화마다 sensor/session_xxx 폴더에 기록하고 여유 공간 확인, 부족한 경우 녹화 일시정지 (set_storage 참고)
+        self.storage = StorageManager(self.writer.root, policy=STORAGE_PAUSE)
+
+    @property
+    def sensor(self):
+        """첫번째 센서 (화면에 그리는 센서)"""
+        for sensor in self.sensors.values():
+            return sensor
+        return None
+
+    def _sensor_spec(self, index, worker=None):
+        """센서 index -> (센서 클래스, 생성 인자)"""
+        if index == 1:
+            print("sensor Camera_Depth")
+            return Camera_Depth, dict(select_sensor=0, preview=self.preview, record_metric=self.depth_metric,
+                                      worker=worker)
+        elif index == 2:
+            print("sensor Lider_Raycast")
+            return Sensor_Lider, dict(select_sensor=0, preview=self.preview, bev=self.lidar_bev,
+                                      downsampler=self.lidar_downsampler, worker=worker)
+        elif index == 3:
+            print("sensor Camera_segmentation")
+            return Camera_Segmentation, dict(select_sensor=0, preview=self.preview, worker=worker)
+        elif index == 4:
+            print("sensor Camera_dvs")
+            return Camera_Dvs, dict(select_sensor=0, preview=self.preview, window=self.dvs_window, worker=worker)
+        print("sensor Camera_Rgb")
+        return Camera_Rgb, dict(select_sensor=0, preview=self.preview, worker=worker)
+
+    def _new_worker(self, name):
+        if not self.sensor_workers:
+            return None
+        worker = SensorWorker(name, metrics=self.metrics, on_done=self.frame_sync.notify)
+        worker.start()
+        return worker
+
+    def _attach(self, name, sensor, worker):
+        sensor.set_recording(self.recoding_check, self.writer)
+        self.sensors[name] = sensor
+        if worker is not None:
+            self.workers[name] = worker
+
+    def add_sensor(self, name, index=0):
+        """
+        센서 추가. 녹화 중인 경우 바로 녹화에 포함됨.
+        :param name: 센서 이름 (예: 'rgb', 'depth', 'lidar')
+        :param index: 0 Camera_Rgb, 1 Camera_Depth, 2 Sensor_Lider, 3 Camera_Segmentation, 4 Camera_Dvs
+                      (같은 index 의 센서는 저장 id 가 같으므로 하나만 추가 가능)
+        :return: 생성된 센서
+        """
+        if name in self.sensors:
+            raise ValueError('sensor name already in use: %s' % name)
+        self._check_streams([(name, index)], self.sensors)
+        worker = self._new_worker(name)
+        sensor_class, kwargs = self._sensor_spec(index, worker)
+        sensor = sensor_class(self.world, self.target, self.args, bp_library=self.bp_library, **kwargs)
+        self._attach(name, sensor, worker)
+        return sensor
+
+    @staticmethod
+    def _check_streams(rig, sensors):
+        """
+        버퍼, 저장소, 샤드 폴더는 센서 테이블의 저장 id ('a-0', 'b-0' 등) 기준이므로
+        같은 저장 id 를 쓰는 센서가 둘 이상이면 ValueError.
+        """
+        used = dict((sensor.sensor_id, name) for name, sensor in sensors.items())
+        for name, index in rig:
+            table, column = sensor_streams.get(index, sensor_streams[0])
+            stream_id = table[0][column]
+            if stream_id in used:
+                raise ValueError('sensor %s would record into the same stream %s as sensor %s'
+                                 % (name, stream_id, used[stream_id]))
+            used[stream_id] = name
+
+    def remove_sensor(self, name):
+        sensor = self.sensors.pop(name)
+        sensor.destroy()
+        worker = self.workers.pop(name, None)
+        if worker is not None:
+            worker.stop()
+        self.frame_sync.forget(name)
+
+    def set_sensors(self, rig):
+        """
+        센서 구성을 한번에 설정, 기존 센서는 제거됨.
+        client 가 있는 경우 제거/생성을 각각 한번의 batch 요청으로 처리함 (RigSpawner).
+        :param rig: [(이름, index), ...] (예: [('rgb', 0), ('depth', 1), ('lidar', 2)]), index 는 센서마다 달라야 함
+        """
+        # 기존 센서를 제거하기 전에 구성 확인
+        self._check_streams(rig, {})
+        if self.spawner is None:
+            for name in list(self.sensors):
+                self.remove_sensor(name)
+            for name, index in rig:
+                self.add_sensor(name, index)
+            return self.sensors
+
+        self.spawner.destroy(list(self.sensors.values()))
+        for worker in self.workers.values():
+            worker.stop()
+        for name in self.sensors:
+            self.frame_sync.forget(name)
+        self.sensors.clear()
+        self.workers.clear()
+
+        workers = [self._new_worker(name) for name, _ in rig]
+        specs = [self._sensor_spec(index, worker) for (_, index), worker in zip(rig, workers)]
+        try:
+            sensors = self.spawner.spawn(self.target, self.args, specs)
+        except RuntimeError:
+            for worker in workers:
+                if worker is not None:
+                    worker.stop()
+            raise
+        for (name, _), sensor, worker in zip(rig, sensors, workers):
+            self._attach(name, sensor, worker)
+        return self.sensors
 
     def select_sensor(self, index=-1, check=False):
-        if self.sensor is None:
-            if index == -1:
-                print("sensor Camera_Rgb")
-                self.sensor = Camera_Rgb(self.world, self.target, self.args, select_sensor=0)
-            elif index == 0:
-                print("sensor Camera_Rgb")
-                self.sensor = Camera_Rgb(self.world, self.target, self.args, select_sensor=0)
-            elif index == 1:
-                print("sensor Camera_Depth")
-                self.sensor = Camera_Depth(self.world, self.target, self.args, select_sensor=0)
-            elif index == 2:
-                print("sensor Lider_Raycast")
-                self.sensor = Sensor_Lider(self.world, self.target, self.args, select_sensor=0)
-            elif index == 3:
-                print("sensor Camera_segmentation")
-                self.sensor = Camera_Segmentation(self.world, self.target, self.args, select_sensor=0)
-            elif index == 4:
-                print("sensor Camera_dvs")
-                self.sensor = Camera_Dvs(self.world, self.target, self.args, select_sensor=0)
-
-            return self.sensor
-        else:
-            # print("sensor is alive")
-            return self.sensor
+        if not self.sensors:
+            self.add_sensor('sensor', max(0, index))
+        return self.sensor
+
+    def render(self, display):
+        sensor = self.sensor
+        if sensor is not None:
+            sensor.render(display)
 
     def set_radar(self):
         if self.radar_sensor is None:
-            self.radar_sensor = Sensor_Radar(self.world, self.target, self.args, select_sensor=0)
+            self.radar_sensor = Sensor_Radar(self.world, self.target, self.args, select_sensor=0,
+                                             bp_library=self.bp_library)
+            self.radar_sensor.set_recording(self.recoding_check, self.writer)
             print("레이다 시작")
         elif self.radar_sensor is not None:
             self.radar_sensor.destroy()
             self.radar_sensor = None
             print("레이다 종료")
 
+    def set_bundling(self, check=False, extra_sensors=(), timeout=1.0):
+        """
+        녹화 시 동일 프레임의 센서 데이터를 하나의 샘플로 묶어 저장. 다음 녹화 시작부터 적용.
+        :param check: True 인 경우 센서별 저장 대신 번들 저장
+        :param extra_sensors: 함께 묶을 센서 (예: World.imu, World.gnss)
+        :param timeout: 모든 센서 데이터 대기 시간(초), 초과시 부분 샘플로 저장
+        """
+        self.bundle_check = check
+        self.bundle_sensors = list(extra_sensors)
+        self.bundle_timeout = timeout
+
+    def _bundle_sources(self):
+        return [x for x in list(self.sensors.values()) + [self.radar_sensor] + self.bundle_sensors if x is not None]
+
     def recording(self):
         if self.recoding_check is False:
+            if self.storage is not None:
+                try:
+                    self.writer.set_root(self.storage.begin_session(self._bytes_written()))
+                except RuntimeError as ex:
+                    print("system : 녹화 시작 실패 : %s" % ex)
+                    return
+                self.writer.storage = self.storage
             self.recoding_check = True
+            self.writer.start()
+            if self.manifest_check:
+                self._open_manifest()
+            for sensor in self.telemetry_sensors:
+                sensor.set_telemetry(TelemetryLog(os.path.join(self.writer.root, sensor.sensor_id),
+                                                  sensor.telemetry_columns))
+            if self.bundle_check:
+                sources = self._bundle_sources()
+                self.bundler = FrameBundler([x.sensor_id for x in sources], self.writer, self.bundle_timeout)
+                for source in sources:
+                    source.set_bundler(self.bundler)
             print("녹화시작")
         elif self.recoding_check is True:
             self.recoding_check = False
             print("녹화종료")
 
-        self.sensor.set_recording(self.recoding_check)
+        for sensor in self.sensors.values():
+            sensor.set_recording(self.recoding_check, self.writer)
+        if self.radar_sensor is not None:
+            self.radar_sensor.set_recording(self.recoding_check, self.writer)
+        if self.recoding_check is False:
+            if self.bundler is not None:
+                for source in self._bundle_sources():
+                    source.set_bundler(None)
+                self.bundler.flush()
+                self.bundler = None
+            # 녹화 종료 시 큐에 남은 프레임을 모두 기록함.
+            self.writer.flush()
+            self._close_telemetry()
+            self._close_manifest()
+            self._end_session()
+
+    def _close_telemetry(self):
+        for sensor in self.telemetry_sensors:
+            telemetry = sensor.telemetry
+            sensor.set_telemetry(None)
+            if telemetry is not None:
+                telemetry.close()
+
+    def _bytes_written(self):
+        return sum(stats['bytes_written'] for stats in self.writer.stats().values())
+
+    def _end_session(self):
+        if self.writer.storage is not None:
+            self.writer.storage = None
+            # 세션 파일을 닫고 다음 세션까지 기본 폴더 사용
+            self.writer.set_root(self.storage.root)
+            self.storage.end_session()
+
+    def _open_manifest(self):
+        vehicle = self.manifest_vehicle if self.manifest_vehicle is not None else self.target
+        self.manifest = SessionManifest(os.path.join(self.writer.root, MANIFEST_NAME))
+        self.writer.manifest = self.manifest
+        self.pose_recorder = PoseRecorder(self.world, vehicle, self.manifest)
+        self.pose_recorder.start()
+
+    def _close_manifest(self):
+        if self.pose_recorder is not None:
+            self.pose_recorder.stop()
+            self.pose_recorder = None
+        if self.manifest is not None:
+            self.writer.manifest = None
+            self.manifest.close()
+            self.manifest = None
+
+    def set_storage(self, check=True, root='sensor', quota=None, policy=STORAGE_PAUSE, min_free=DEFAULT_MIN_FREE):
+        """
+        저장 용량 관리 설정 (다음 녹화부터 적용).
+        :param check: True 인 경우 녹화마다 root/session_xxx 폴더를 만들어 기록, False 인 경우 root 에 바로 기록
+        :param root: 저장 폴더
+        :param quota: root 아래 전체 세션 크기 상한 (byte), None 인 경우 제한 없음
+        :param policy: 상한 또는 최소 여유 공간을 넘는 경우 sensor_storage.STORAGE_PAUSE (녹화 일시정지, 기본값),
+                       STORAGE_ROTATE (오래된 세션 삭제, 명시적으로 지정한 경우에만)
+        :param min_free: 최소 디스크 여유 공간 (byte), 녹화 시작 전에도 확인
+        """
+        if self.recoding_check:
+            raise RuntimeError('cannot change the storage while recording')
+        self.storage = StorageManager(root, quota, policy, min_free) if check else None
+        self.writer.set_root(root)
+
+    def storage_stats(self):
+        """
+        현재 세션 폴더, 세션/이전 세션 크기, 여유 공간, 일시정지 여부 반환.
+        :return: {session, session_bytes, older_bytes, quota, free, paused, rotated, rotating}
+        """
+        return self.storage.stats() if self.storage is not None else {}
+
+    def set_telemetry(self, sensors=()):
+        """
+        IMU / GNSS 전체 샘플 기록 설정 (다음 녹화부터 적용).
+        녹화 중 모든 샘플을 frame, timestamp 와 함께 sensor_id 폴더의 컬럼 파일로 기록함 (sensor_telemetry.read_telemetry).
+        :param sensors: GnssSensor, IMUSensor 목록 (예: no_rendering_core.World 의 gnss, imu)
+        """
+        if self.recoding_check:
+            raise RuntimeError('cannot change the telemetry sensors while recording')
+        self.telemetry_sensors = [x for x in sensors if x is not None]
+
+    def set_manifest(self, check=True, vehicle=None):
+        """
+        녹화 세션 인덱스 설정 (다음 녹화부터 적용).
+        기록된 프레임마다 frame, 시뮬레이션/실제 시간, 센서 id, 파일/오프셋을, 시뮬레이션 프레임마다 ego 위치, 속도, 날씨를
+        writer root 의 manifest.sqlite 에 기록함 (sensor_manifest.SessionManifest).
+        :param check: True 인 경우 인덱스 기록
+        :param vehicle: 위치/속도를 기록할 차량 (예: VehicleRouteManager.agent.vehicle), None 인 경우 target
+        """
+        self.manifest_check = check
+        self.manifest_vehicle = vehicle
+
+    def set_lidar_store(self, check=True, shard_size=DEFAULT_SHARD_SIZE, quantize=False, scale=0.01):
+        """
+        라이다 저장 형식 설정.
+        :param check: True 인 경우 샤드 파일 + 인덱스로 저장, False 인 경우 프레임별 PLY 파일로 저장
+        :param shard_size: 샤드 파일 크기 (byte)
+        :param quantize: True 인 경우 좌표를 int16 으로 양자화하여 저장
+        :param scale: 양자화 단위 (m)
+        """
+        if check:
+            self.writer.register_store(
+                KIND_LIDAR, lambda root, sensor_id: LidarStore(root, sensor_id, shard_size, quantize, scale))
+        else:
+            self.writer.unregister_store(KIND_LIDAR)
+
+    def set_image_store(self, check=True, shard_size=DEFAULT_SHARD_SIZE):
+        """
+        카메라 이미지 저장 형식 설정.
+        :param check: True 인 경우 인코딩된 프레임을 세그먼트 파일 + 인덱스로 저장, False 인 경우 프레임별 파일로 저장
+        :param shard_size: 세그먼트 파일 크기 (byte)
+        """
+        if check:
+            # 인코더는 저장소 생성 시점의 writer.encoder 사용 (set_image_codec 참고)
+            self.writer.register_store(
+                KIND_IMAGE, lambda root, sensor_id: ImageStore(root, sensor_id, self.writer.encoder, shard_size))
+        else:
+            self.writer.unregister_store(KIND_IMAGE)
+
+    def set_depth_metric(self, check=False):
+        """
+        depth 카메라 저장 형식 설정 (다음 add_sensor 부터 적용).
+        :param check: True 인 경우 float32 거리(m) 맵을 샤드로 저장, False 인 경우 변환 PNG 저장
+        """
+        self.depth_metric = check
+
+    def set_lidar_bev(self, check=False, resolution=0.1, x_range=(-40.0, 40.0), y_range=(-40.0, 40.0),
+                      z_range=(-3.0, 3.0)):
+        """
+        라이다 BEV 격자 저장 설정 (height, density, intensity 3채널 float32, 다음 add_sensor 부터 적용).
+        :param check: True 인 경우 녹화 중 매 스윕의 BEV 격자를 'bev' 샤드로 저장
+        :param resolution: 셀 크기 (m)
+        :param x_range: 전방 범위 (m)
+        :param y_range: 좌우 범위 (m)
+        :param z_range: 높이 범위 (m)
+        """
+        self.lidar_bev = BevRasterizer(resolution, x_range, y_range, z_range) if check else None
+        for sensor in self.sensors.values():
+            if isinstance(sensor, Sensor_Lider):
+                sensor.bev = self.lidar_bev
+
+    def set_lidar_downsample(self, voxel_size=None, ratio=None, seed=None):
+        """
+        라이다 저장 전 다운샘플링 설정 (둘 다 None 인 경우 해제).
+        :param voxel_size: 복셀 크기 (m), 복셀당 포인트 1개만 저장
+        :param ratio: 무작위로 남길 포인트 비율 (0 ~ 1)
+        :param seed: 무작위 샘플링 seed
+        """
+        if voxel_size is None and ratio is None:
+            self.lidar_downsampler = None
+        else:
+            self.lidar_downsampler = LidarDownsampler(voxel_size, ratio, seed)
+        for sensor in self.sensors.values():
+            if isinstance(sensor, Sensor_Lider):
+                sensor.downsampler = self.lidar_downsampler
+
+    def set_preview(self, check=True):
+        """
+        센서 미리보기 설정 (다음 add_sensor 부터 적용).
+        :param check: False 인 경우 미리보기 변환을 하지 않음 (headless 수집)
+        """
+        self.preview = check
+
+    def set_dvs_window(self, window=0.05):
+        """
+        DVS 미리보기 누적 시간 설정.
+        :param window: 누적 시간 (초, 예: 0.01, 0.05)
+        """
+        self.dvs_window = window
+        for sensor in self.sensors.values():
+            if isinstance(sensor, Camera_Dvs):
+                sensor.set_window(window)
+
+    def set_image_codec(self, codec=None, level=6, quality=90, processes=0):
+        """
+        카메라 이미지 인코딩 설정 (녹화 중이 아닐 때만 변경 가능).
+        :param codec: 'raw', 'png', 'jpeg', 'lz4', 'zstd' (sensor_encoder.available_codecs()), None 인 경우 기본 PNG 저장
+        :param level: png / lz4 / zstd 압축 레벨
+        :param quality: jpeg 품질
+        :param processes: 인코딩 프로세스 수, 0 인 경우 writer 스레드에서 인코딩
+        """
+        if self.recoding_check:
+            raise RuntimeError('cannot change the image codec while recording')
+        # 이전 세션의 남은 프레임은 이전 인코더로 기록되고, 다음 녹화의 이미지 저장소부터 새 인코더 사용
+        self.writer.set_encoder(ImageEncoder(codec, level, quality, processes) if codec is not None else None)
+
+    def set_recording_rates(self, rates=None, adaptive=False, max_byte_rate=None, high_water=0.5, low_water=0.1):
+        """
+        센서별 기록 주기 설정 (프레임을 건너뛰어 기록, 미리보기는 전체 주기 유지).
+        :param rates: {센서 이름 또는 sensor_id: Hz} (예: {'a-0': 10, 'b-0': 20, 'a-1': 5}), None 인 경우 전체 프레임 기록
+        :param adaptive: True 인 경우 writer 큐가 high_water 이상 차거나 프레임 손실 / max_byte_rate 초과 시 주기를 낮추고,
+                         큐가 low_water 이하로 비면 다시 높임
+        :param max_byte_rate: 디스크 기록 속도 상한 (byte/s)
+        :param high_water: 주기를 낮추는 버퍼 사용률 (0 ~ 1)
+        :param low_water: 주기를 되돌리는 버퍼 사용률 (0 ~ 1)
+        """
+        if not rates and not adaptive:
+            self.writer.rate_controller = None
+            return
+        rates = dict((self.sensors[key].sensor_id if key in self.sensors else key, rate)
+                     for key, rate in (rates or {}).items())
+        self.writer.rate_controller = RateController(rates, adaptive, high_water, low_water, max_byte_rate)
+
+    def rate_stats(self):
+        """
+        센서별 목표/현재 기록 주기와 기록/건너뛴 프레임 수 반환.
+        :return: {sensor_id: {target, rate, scale, admitted, skipped}}
+        """
+        if self.writer.rate_controller is None:
+            return {}
+        return self.writer.rate_controller.stats()
+
+    def configure_buffer(self, sensor_id, capacity=None, policy=None):
+        """
+        센서별 링버퍼 크기와 정책 설정.
+        :param sensor_id: 센서 저장 id (예: 'a-0', 'b-0')
+        :param capacity: 버퍼 프레임 수
+        :param policy: sensor_buffer.DROP_OLDEST, DROP_NEWEST, BLOCK
+        """
+        self.writer.configure_buffer(sensor_id, capacity, policy)
+
+    def buffer_stats(self):
+        """
+        센서별 큐 깊이, 프레임 수(enqueued/dropped/written), 기록 바이트 수 반환.
+        :return: {sensor_id: {...}}
+        """
+        return self.writer.stats()
+
+    def worker_stats(self):
+        """
+        센서 worker 별 대기 측정값 수와 처리/버린 측정값 수 반환.
+        :return: {이름: {...}}
+        """
+        return dict((name, worker.stats()) for name, worker in self.workers.items())
+
+    def metrics_snapshot(self):
+        """
+        센서 수집 상태 반환 (sensor_metrics.SensorMetrics.snapshot).
+        :return: {'sensors': {이름: {rate, latency, ...}}, 'streams': {sensor_id: {byte_rate, depth, dropped, ...}}, ...}
+        """
+        return self.metrics.snapshot()
 
     def destroy(self):
-        self.sensor.destroy()
-        self.sensor = None
+        if self._metrics_tick is not None:
+            self.world.remove_on_tick(self._metrics_tick)
+            self._metrics_tick = None
+        if self.spawner is not None:
+            self.set_sensors([])
+        for name in list(self.sensors):
+            self.remove_sensor(name)
+        if self.radar_sensor is not None:
+            self.radar_sensor.destroy()
+            self.radar_sensor = None
+        self.writer.stop()
+        self._close_telemetry()
+        self._close_manifest()
+        self._end_session()
@@ -20,6 +20,11 @@ import data_collection_vehicle_remote.util.no_rendering_package.color_palette as
 
 from data_collection_vehicle_remote.util.Sensors import GnssSensor
 from data_collection_vehicle_remote.util.Sensors import IMUSensor
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_state import ActorState
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_state import KIND_VEHICLE
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_state import KIND_TRAFFIC_LIGHT
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_state import KIND_SPEED_LIMIT
+from data_collection_vehicle_remote.util.no_rendering_package.no_rendering_state import KIND_WALKER
 
 
 # ==============================================================================
@@ -46,8 +51,8 @@ class Util(object):
         return math.sqrt(v.x ** 2 + v.y ** 2 + v.z ** 2)
 
     @staticmethod
-    def get_bounding_box(actor):
-        """Gets the bounding box corners of an actor in world space"""
+    def get_bounding_box(actor, transform=None):
+        """Gets the bounding box corners of an actor in world space (transform defaults to actor.get_transform())"""
         bb = actor.trigger_volume.extent
         corners = [carla.Location(x=-bb.x, y=-bb.y),
                    carla.Location(x=bb.x, y=-bb.y),
@@ -55,7 +60,7 @@ class Util(object):
                    carla.Location(x=-bb.x, y=bb.y),
                    carla.Location(x=-bb.x, y=-bb.y)]
         corners = [x + actor.trigger_volume.location for x in corners]
-        t = actor.get_transform()
+        t = actor.get_transform() if transform is None else transform
         t.transform(corners)
         return corners
 
@@ -574,7 +579,8 @@ class World(object):
         # World data
         self.world = None
         self.town_map = None
-        self.actors_with_transforms = []
+        # 매 프레임 world.get_snapshot() 으로 갱신하는 전체 액터 상태
+        self.actor_state = ActorState()
 
         self._hud = None
         self._input = None
@@ -607,6 +613,9 @@ class World(object):
         self.gnss = None
         self.imu = None
 
+        # 센서 수집 상태 (sensor_metrics.SensorMetrics, 예: SensorManager.metrics), None 인 경우 표시하지 않음
+        self.sensor_metrics = None
+
     def _get_data_from_carla(self):
         """Retrieves the data from the server side"""
         try:
@@ -740,17 +749,16 @@ class World(object):
 
     def tick(self, clock, routeManager):
         """Retrieves the actors for Hero and Map modes and updates de HUD based on that"""
-        actors = self.world.get_actors()
-
-        # We store the transforms also so that we avoid having transforms of
-        # previous tick and current tick when rendering them.
-        self.actors_with_transforms = [(actor, actor.get_transform()) for actor in actors]
+        # 한번의 스냅샷으로 모든 액터의 transform / velocity 를 읽어 이번 프레임의 렌더링과 HUD 에 사용
+        state = self.actor_state.update(self.world)
         if self.hero_actor is not None:
-            self.hero_transform = self.hero_actor.get_transform()
-            if self.hero_actor.get_location().x == 0.000000 and self.hero_actor.get_location().y == 0.000000 and self.hero_actor.get_location().z == 0.000000:
+            row = state.row(self.hero_actor.id)
+            # 스냅샷에 없거나 원점에 있는 경우 제거된 차량으로 판단
+            if row is None or not state.location[row].any():
                 self.hero_actor.destroy()
                 self.destroy()
                 sys.exit()
+            self.hero_transform = state.transforms[row]
 
         self.routeManager = routeManager
         self.update_hud_info(clock)
@@ -760,9 +768,9 @@ class World(object):
 
         hero_mode_text = []
         sensor_text = []
-        if self.hud_target is not None:
-            hero_speed = self.hud_target.get_velocity()
-            hero_speed_text = 3.6 * math.sqrt(hero_speed.x ** 2 + hero_speed.y ** 2 + hero_speed.z ** 2)
+        row = self.actor_state.row(self.hud_target.id) if self.hud_target is not None else None
+        if row is not None:
+            hero_speed_text = self.actor_state.speed[row]
 
             affected_traffic_light_text = 'None'
             if self.affected_traffic_light is not None:
@@ -786,7 +794,7 @@ class World(object):
             #     '  Traffic Light: %12s' % affected_traffic_light_text,
             #     '  Speed Limit:       %3d km/h' % affected_speed_limit_text
             # ]
-            w = self.town_map.get_waypoint(self.hud_target.get_location())
+            w = self.town_map.get_waypoint(self.actor_state.transforms[row].location)
             hero_mode_text = [
                 'Target ID:            %7d' % self.hud_target.id,
                 'Target Speed:        %3d km/h' % hero_speed_text,
@@ -828,6 +836,8 @@ class World(object):
         self._hud.add_info(self.name, info_text)
         self._hud.add_info('STATUS', hero_mode_text)
         self._hud.add_info('LOCATION', sensor_text)
+        if self.sensor_metrics is not None:
+            self._hud.add_info('SENSORS', self.sensor_metrics.hud_lines())
 
     @staticmethod
     def on_world_tick(weak_self, timestamp):
@@ -844,60 +854,37 @@ class World(object):
         """Shows nearby vehicles of the hero actor"""
         info_text = []
         if self.hero_actor is not None and len(vehicles) > 1:
+            state = self.actor_state
             location = self.hero_transform.location
-            vehicle_list = [x[0] for x in vehicles if x[0].id != self.hero_actor.id]
-
-            def distance(v):
-                return location.distance(v.get_location())
-
-            for n, vehicle in enumerate(sorted(vehicle_list, key=distance)):
-                if n > 15:
-                    break
+            for row in state.nearest((location.x, location.y, location.z), KIND_VEHICLE, self.hero_actor.id):
+                vehicle = state.actors[row]
                 vehicle_type = get_actor_display_name(vehicle, truncate=22)
                 info_text.append('% 5d %s' % (vehicle.id, vehicle_type))
         self._hud.add_info('NEARBY VEHICLES', info_text)
 
     def _split_actors(self):
-        """Splits the retrieved actors by type id"""
-        vehicles = []
-        traffic_lights = []
-        speed_limits = []
-        walkers = []
-
-        for actor_with_transform in self.actors_with_transforms:
-            actor = actor_with_transform[0]
-            if 'vehicle' in actor.type_id:
-                vehicles.append(actor_with_transform)
-            elif 'traffic_light' in actor.type_id:
-                traffic_lights.append(actor_with_transform)
-            elif 'speed_limit' in actor.type_id:
-                speed_limits.append(actor_with_transform)
-            elif 'walker.pedestrian' in actor.type_id:
-                walkers.append(actor_with_transform)
-
-        return (vehicles, traffic_lights, speed_limits, walkers)
+        """Splits the actors of the last snapshot by type into (actor, transform) lists"""
+        state = self.actor_state
+        return (state.pairs(KIND_VEHICLE), state.pairs(KIND_TRAFFIC_LIGHT), state.pairs(KIND_SPEED_LIMIT),
+                state.pairs(KIND_WALKER))
 
     # 신호등 정보 업데이트
     def _render_traffic_lights(self, surface, list_tl, world_to_pixel):
         """Renders the traffic lights and shows its triggers and bounding boxes if flags are enabled"""
         self.affected_traffic_light = None
 
-        for tl in list_tl:
-            world_pos = tl.get_location()
+        for tl, tl_t in list_tl:
+            world_pos = tl_t.location
             pos = world_to_pixel(world_pos)
 
             if self.args.show_triggers:
-                corners = Util.get_bounding_box(tl)
+                corners = Util.get_bounding_box(tl, tl_t)
                 corners = [world_to_pixel(p) for p in corners]
                 pygame.draw.lines(surface, c.COLOR_BUTTER_1, True, corners, 2)
 
             if self.hero_actor is not None:
-                corners = Util.get_bounding_box(tl)
-                corners = [world_to_pixel(p) for p in corners]
-                tl_t = tl.get_transform()
-
                 transformed_tv = tl_t.transform(tl.trigger_volume.location)
-                hero_location = self.hero_actor.get_location()
+                hero_location = self.hero_transform.location
                 d = hero_location.distance(transformed_tv)
                 s = Util.length(tl.trigger_volume.extent) + Util.length(self.hero_actor.bounding_box.extent)
                 if (d <= s):
@@ -916,9 +903,9 @@ class World(object):
         radius = world_to_pixel_width(2)
         font = pygame.font.SysFont('Arial', font_size)
 
-        for sl in list_sl:
+        for sl, sl_t in list_sl:
 
-            x, y = world_to_pixel(sl.get_location())
+            x, y = world_to_pixel(sl_t.location)
 
             # Render speed limit concentric circles
             white_circle_radius = int(radius * 0.75)
@@ -930,7 +917,7 @@ class World(object):
             font_surface = font.render(limit, True, c.COLOR_ALUMINIUM_5)
 
             if self.args.show_triggers:
-                corners = Util.get_bounding_box(sl)
+                corners = Util.get_bounding_box(sl, sl_t)
                 corners = [world_to_pixel(p) for p in corners]
                 pygame.draw.lines(surface, c.COLOR_PLUM_2, True, corners, 2)
 
@@ -1036,8 +1023,8 @@ class World(object):
     def render_actors(self, surface, vehicles, traffic_lights, speed_limits, walkers, routeManager):
         """Renders all the actors"""
         # Static actors
-        self._render_traffic_lights(surface, [tl[0] for tl in traffic_lights], self.map_image.world_to_pixel)
-        self._render_speed_limits(surface, [sl[0] for sl in speed_limits], self.map_image.world_to_pixel,
+        self._render_traffic_lights(surface, traffic_lights, self.map_image.world_to_pixel)
+        self._render_speed_limits(surface, speed_limits, self.map_image.world_to_pixel,
                                   self.map_image.world_to_pixel_width)
 
         # Dynamic actors
@@ -1076,7 +1063,7 @@ class World(object):
 
     def render(self, display, routeManager):
         """Renders the map and all the actors in hero and map mode"""
-        if self.actors_with_transforms is None:
+        if self.actor_state.frame is None:
             return
         self.result_surface.fill(c.COLOR_BLACK)
 
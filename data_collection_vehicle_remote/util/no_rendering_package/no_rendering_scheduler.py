@@ -0,0 +1,132 @@
+import time
+import threading
+
+PACING_SLEEP = 'sleep'
+PACING_TICK = 'tick'
+
+# 마감 직전에는 sleep 대신 양보하며 대기 (Windows 의 sleep 해상도는 약 15ms)
+SPIN_MARGIN = 0.002
+
+
+class _Stage(object):
+    __slots__ = ('name', 'func', 'period', 'deadline', 'runs', 'missed', 'max_late', 'busy')
+
+    def __init__(self, name, func, period):
+        self.name = name
+        self.func = func
+        self.period = period
+        self.deadline = None
+        self.runs = 0
+        self.missed = 0
+        self.max_late = 0.0
+        self.busy = 0.0
+
+
+# ==============================================================================
+# -- LoopScheduler -------------------------------------------------------------
+# ==============================================================================
+
+
+class LoopScheduler(object):
+    """Paces the main loop stages (route control, world/HUD tick, render) without a busy wait.
+
+    Every stage has its own rate. run_once() blocks until the earliest stage deadline and runs the stages
+    that are due. With PACING_SLEEP it sleeps until shortly before the deadline and yields (time.sleep(0))
+    for the last SPIN_MARGIN, so the sensor callback threads keep the GIL; with PACING_TICK it is woken by
+    world.on_tick and runs the due stages right after a server tick (a stage may then run up to half a
+    period early), falling back to the deadline if no tick arrives. A stage starting more than half a
+    period after its deadline counts as a missed deadline and is realigned instead of running in bursts.
+    """
+
+    def __init__(self, world=None, pacing=PACING_SLEEP, report_interval=10.0):
+        if pacing == PACING_TICK and world is None:
+            raise ValueError('tick pacing needs the carla world')
+        self.pacing = pacing
+        self.report_interval = report_interval
+        self._stages = []
+        self._tick = threading.Event()
+        self._world = world
+        self._callback_id = world.on_tick(self._on_tick) if pacing == PACING_TICK else None
+        self._next_report = None
+        self._reported = 0
+
+    def _on_tick(self, snapshot):
+        self._tick.set()
+
+    def add_stage(self, name, func, rate):
+        """func() runs rate times per second"""
+        self._stages.append(_Stage(name, func, 1.0 / rate))
+
+    def _next_deadline(self, now):
+        for stage in self._stages:
+            if stage.deadline is None:
+                stage.deadline = now
+        return min(stage.deadline for stage in self._stages)
+
+    def _wait(self, deadline):
+        if self.pacing == PACING_TICK:
+            remaining = deadline - time.perf_counter()
+            self._tick.wait(max(0.0, remaining))
+            self._tick.clear()
+            return
+        remaining = deadline - time.perf_counter()
+        if remaining > SPIN_MARGIN:
+            time.sleep(remaining - SPIN_MARGIN)
+        while time.perf_counter() < deadline:
+            time.sleep(0)
+
+    def run_once(self, block=True):
+        """Runs the stages that are due, waiting for the earliest deadline first when block is True"""
+        if not self._stages:
+            return
+        if block:
+            self._wait(self._next_deadline(time.perf_counter()))
+        for stage in self._stages:
+            now = time.perf_counter()
+            if stage.deadline is None:
+                stage.deadline = now
+            early = 0.5 * stage.period if self.pacing == PACING_TICK else 0.0
+            if now + early < stage.deadline:
+                continue
+            late = now - stage.deadline
+            if late > 0.5 * stage.period:
+                stage.missed += 1
+                stage.max_late = max(stage.max_late, late)
+            stage.func()
+            stage.runs += 1
+            stage.busy += time.perf_counter() - now
+            stage.deadline += stage.period
+            if stage.deadline < now:
+                stage.deadline = now + stage.period
+        self._report()
+
+    def _report(self):
+        if not self.report_interval:
+            return
+        now = time.perf_counter()
+        if self._next_report is None:
+            self._next_report = now + self.report_interval
+        if now < self._next_report:
+            return
+        self._next_report = now + self.report_interval
+        missed = sum(stage.missed for stage in self._stages)
+        if missed > self._reported:
+            print("system : 루프 마감 초과 %d 회 (%s)" % (missed - self._reported, ', '.join(
+                '%s %d, 최대 %dms' % (stage.name, stage.missed, int(stage.max_late * 1000))
+                for stage in self._stages if stage.missed)))
+            self._reported = missed
+
+    def stats(self):
+        """{stage name: {rate, runs, missed, max_late, busy}}, busy is the total run time in seconds"""
+        return dict((stage.name, {
+            'rate': 1.0 / stage.period,
+            'runs': stage.runs,
+            'missed': stage.missed,
+            'max_late': stage.max_late,
+            'busy': stage.busy,
+        }) for stage in self._stages)
+
+    def destroy(self):
+        if self._callback_id is not None:
+            self._world.remove_on_tick(self._callback_id)
+            self._callback_id = None
@@ -0,0 +1,126 @@
+import numpy as np
+
+# 액터 종류 코드
+KIND_OTHER = 0
+KIND_VEHICLE = 1
+KIND_TRAFFIC_LIGHT = 2
+KIND_SPEED_LIMIT = 3
+KIND_WALKER = 4
+
+
+def actor_kind(type_id):
+    if 'vehicle' in type_id:
+        return KIND_VEHICLE
+    if 'traffic_light' in type_id:
+        return KIND_TRAFFIC_LIGHT
+    if 'speed_limit' in type_id:
+        return KIND_SPEED_LIMIT
+    if 'walker.pedestrian' in type_id:
+        return KIND_WALKER
+    return KIND_OTHER
+
+
+# ==============================================================================
+# -- ActorState ----------------------------------------------------------------
+# ==============================================================================
+
+
+class ActorState(object):
+    """Per frame state of every actor, built from one world.get_snapshot() call.
+
+    Columns are aligned by row: ids, kinds, location (n, 3), velocity (n, 3) and speed (km/h) as numpy
+    arrays, transforms and actors as lists (carla.Transform is still needed to place the bounding boxes).
+    The carla.Actor objects, their type and static attributes are looked up once per actor with a single
+    world.get_actors(new_ids) call when the actor first appears, and dropped when it leaves the snapshot.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.timestamp = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.kinds = np.zeros(0, dtype=np.int8)
+        self.location = np.zeros((0, 3), dtype=np.float64)
+        self.velocity = np.zeros((0, 3), dtype=np.float64)
+        self.speed = np.zeros(0, dtype=np.float64)
+        self.transforms = []
+        self.actors = []
+        self._rows = {}
+        # actor id -> (carla.Actor, kind)
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.actors)
+
+    def update(self, world, snapshot=None):
+        """Reads the state of every actor from the snapshot (world.get_snapshot() when not given)"""
+        snapshot = world.get_snapshot() if snapshot is None else snapshot
+        actor_snapshots = list(snapshot)
+
+        new_ids = [x.id for x in actor_snapshots if x.id not in self._cache]
+        if new_ids:
+            for actor in world.get_actors(new_ids):
+                self._cache[actor.id] = (actor, actor_kind(actor.type_id))
+        # 스냅샷에 없는 액터 (제거됨) 는 캐시에서 삭제
+        if len(self._cache) > len(actor_snapshots):
+            alive = set(x.id for x in actor_snapshots)
+            for actor_id in [x for x in self._cache if x not in alive]:
+                del self._cache[actor_id]
+
+        n = len(actor_snapshots)
+        ids = np.empty(n, dtype=np.int64)
+        kinds = np.empty(n, dtype=np.int8)
+        location = np.empty((n, 3), dtype=np.float64)
+        velocity = np.empty((n, 3), dtype=np.float64)
+        transforms = []
+        actors = []
+        rows = {}
+        row = 0
+        for actor_snapshot in actor_snapshots:
+            cached = self._cache.get(actor_snapshot.id)
+            if cached is None:
+                continue
+            transform = actor_snapshot.get_transform()
+            v = actor_snapshot.get_velocity()
+            ids[row] = actor_snapshot.id
+            kinds[row] = cached[1]
+            location[row] = (transform.location.x, transform.location.y, transform.location.z)
+            velocity[row] = (v.x, v.y, v.z)
+            transforms.append(transform)
+            actors.append(cached[0])
+            rows[actor_snapshot.id] = row
+            row += 1
+
+        self.frame = snapshot.frame
+        self.timestamp = snapshot.timestamp
+        self.ids = ids[:row]
+        self.kinds = kinds[:row]
+        self.location = location[:row]
+        self.velocity = velocity[:row]
+        self.speed = 3.6 * np.sqrt(np.einsum('ij,ij->i', self.velocity, self.velocity))
+        self.transforms = transforms
+        self.actors = actors
+        self._rows = rows
+        return self
+
+    def row(self, actor_id):
+        """Row of an actor, None when it is not in the last snapshot"""
+        return self._rows.get(actor_id)
+
+    def rows(self, kind):
+        return np.flatnonzero(self.kinds == kind)
+
+    def pairs(self, kind):
+        """[(actor, transform), ...] of one kind, the form the render stages draw from"""
+        return [(self.actors[i], self.transforms[i]) for i in self.rows(kind)]
+
+    def nearest(self, location, kind=KIND_VEHICLE, exclude=None, count=16):
+        """Rows of the count actors of kind closest to location (x, y, z), nearest first"""
+        rows = self.rows(kind)
+        if exclude is not None:
+            rows = rows[self.ids[rows] != exclude]
+        if len(rows) == 0:
+            return rows
+        delta = self.location[rows] - np.asarray(location, dtype=np.float64)
+        distance = np.einsum('ij,ij->i', delta, delta)
+        order = np.argsort(distance, kind='stable')[:count]
+        return rows[order]
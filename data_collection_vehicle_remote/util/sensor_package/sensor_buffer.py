@@ -0,0 +1,102 @@
+import threading
+import time
+
+# 버퍼가 가득 찼을 때의 처리 정책
+DROP_OLDEST = 'drop-oldest'  # 가장 오래된 프레임을 버리고 새 프레임 저장
+DROP_NEWEST = 'drop-newest'  # 새로 들어온 프레임을 버림
+BLOCK = 'block'  # 공간이 생길때까지 콜백 스레드를 대기시킴
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+# put() 결과
+ENQUEUED = 0
+REPLACED = 1
+REJECTED = 2
+
+
+# ==============================================================================
+# -- RingBuffer ----------------------------------------------------------------
+# ==============================================================================
+
+
+class RingBuffer(object):
+    """Fixed capacity FIFO of frames for a single sensor with a drop policy and backpressure counters"""
+
+    def __init__(self, capacity=64, policy=DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError('unknown ring buffer policy: %s' % policy)
+        self.capacity = max(1, int(capacity))
+        self.policy = policy
+
+        # 슬롯은 생성시 한번만 할당
+        self._slots = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+
+        # 통계
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.high_water = 0
+        self.last_enqueue_time = 0.0
+
+    def __len__(self):
+        return self._count
+
+    def put(self, item, timeout=None):
+        """Stores an item following the buffer policy. Returns ENQUEUED, REPLACED or REJECTED"""
+        with self._lock:
+            if self._count == self.capacity:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return REJECTED
+                if self.policy == DROP_OLDEST:
+                    self._slots[self._head] = item
+                    self._head = (self._head + 1) % self.capacity
+                    self.dropped += 1
+                    self.enqueued += 1
+                    self.last_enqueue_time = time.time()
+                    return REPLACED
+                if not self._not_full.wait_for(lambda: self._count < self.capacity, timeout):
+                    self.dropped += 1
+                    return REJECTED
+            self._slots[(self._head + self._count) % self.capacity] = item
+            self._count += 1
+            self.enqueued += 1
+            self.high_water = max(self.high_water, self._count)
+            self.last_enqueue_time = time.time()
+            return ENQUEUED
+
+    def get(self):
+        """Pops the oldest item, or returns None when the buffer is empty"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self._not_full.notify()
+            return item
+
+    def mark_written(self, nbytes=0):
+        with self._lock:
+            self.written += 1
+            self.bytes_written += nbytes
+
+    def stats(self):
+        """Snapshot of the counters as a plain dict"""
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'capacity': self.capacity,
+                'depth': self._count,
+                'high_water': self.high_water,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'written': self.written,
+                'bytes_written': self.bytes_written,
+            }
@@ -0,0 +1,94 @@
+import collections
+import threading
+import time
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import FrameData
+
+
+# ==============================================================================
+# -- FrameBundler --------------------------------------------------------------
+# ==============================================================================
+
+
+class FrameBundler(object):
+    """Collects the measurements of several sensors keyed by simulation frame.
+
+    add() is called from the sensor callbacks with a FrameData. Once every expected stream has delivered
+    the same frame, the sample is handed to the writer as a single KIND_BUNDLE FrameData. Frames that are
+    still incomplete after timeout seconds are written as partial samples (emit_partial) or discarded.
+    """
+
+    def __init__(self, streams, writer=None, timeout=1.0, emit_partial=True, on_bundle=None):
+        self.streams = set(str(stream) for stream in streams)
+        self.writer = writer
+        self.timeout = timeout
+        self.emit_partial = emit_partial
+        self.on_bundle = on_bundle
+
+        # frame -> [등록시각(wall), timestamp, {stream_id: FrameData}]
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        # 통계
+        self.completed = 0
+        self.partial = 0
+        self.discarded = 0
+
+    def add(self, frame_data):
+        """Adds the measurement of one stream. Emits every bundle that became complete or expired"""
+        if frame_data.sensor_id not in self.streams:
+            return
+        ready = []
+        now = time.time()
+        with self._lock:
+            entry = self._pending.get(frame_data.frame)
+            if entry is None:
+                entry = [now, frame_data.timestamp, {}]
+                self._pending[frame_data.frame] = entry
+            entry[2][frame_data.sensor_id] = frame_data
+            if len(entry[2]) == len(self.streams):
+                del self._pending[frame_data.frame]
+                ready.append((frame_data.frame, entry, True))
+            ready.extend(self._pop_expired(now))
+        for frame, entry, complete in ready:
+            self._emit(frame, entry, complete)
+
+    def expire(self):
+        """Emits the bundles that waited longer than timeout. Safe to call from any thread"""
+        with self._lock:
+            ready = self._pop_expired(time.time())
+        for frame, entry, complete in ready:
+            self._emit(frame, entry, complete)
+
+    def flush(self):
+        """Emits every pending bundle regardless of the timeout (e.g. when recording stops)"""
+        with self._lock:
+            ready = [(frame, entry, False) for frame, entry in self._pending.items()]
+            self._pending.clear()
+        for frame, entry, complete in ready:
+            self._emit(frame, entry, complete)
+
+    def _pop_expired(self, now):
+        # 프레임 번호 순서로 들어오므로 가장 오래된 항목부터 검사
+        expired = []
+        while self._pending:
+            frame, entry = next(iter(self._pending.items()))
+            if now - entry[0] < self.timeout:
+                break
+            del self._pending[frame]
+            expired.append((frame, entry, False))
+        return expired
+
+    def _emit(self, frame, entry, complete):
+        if complete:
+            self.completed += 1
+        elif self.emit_partial:
+            self.partial += 1
+        else:
+            self.discarded += 1
+            return
+        bundle = FrameData.from_bundle(entry[2], frame, entry[1])
+        if self.on_bundle is not None:
+            self.on_bundle(bundle, complete)
+        if self.writer is not None:
+            self.writer.submit(bundle)
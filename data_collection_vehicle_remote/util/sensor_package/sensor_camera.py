@@ -0,0 +1,149 @@
+import numpy as np
+
+# ==============================================================================
+# -- Depth ---------------------------------------------------------------------
+# ==============================================================================
+
+# CARLA depth 카메라 최대 거리 (m)
+DEPTH_FAR = 1000.0
+# normalized = (R + G * 256 + B * 256 * 256) / (256 ** 3 - 1), raw_data 는 BGRA 순서
+DEPTH_SCALE = DEPTH_FAR / (256.0 ** 3 - 1.0)
+DEPTH_WEIGHTS = (
+    (2, np.float32(DEPTH_SCALE)),
+    (1, np.float32(DEPTH_SCALE * 256.0)),
+    (0, np.float32(DEPTH_SCALE * 256.0 * 256.0)),
+)
+# cc.LogarithmicDepth 와 같은 상수
+LOG_DEPTH_DIVISOR = 5.70378
+
+
+class DepthDecoder(object):
+    """Turns the raw BGRA buffer of sensor.camera.depth into metric float32 maps.
+
+    Replaces image.convert(cc.Depth / cc.LogarithmicDepth): the meters map keeps the full 24 bit precision
+    and the gray previews are derived from it. All outputs are preallocated and reused between frames.
+    """
+
+    def __init__(self, width, height):
+        self.meters = None
+        self.gray = None
+        self._work = None
+        self._resize(width, height)
+
+    def _resize(self, width, height):
+        if self.meters is None or self.meters.shape != (height, width):
+            self.meters = np.zeros((height, width), dtype=np.float32)
+            self.gray = np.zeros((height, width), dtype=np.uint8)
+            self._work = np.zeros((height, width), dtype=np.float32)
+
+    def decode(self, raw_data, width, height):
+        """Returns the (height, width) float32 depth in meters (a reused buffer, copy it to keep it)"""
+        self._resize(width, height)
+        bgra = np.frombuffer(raw_data, dtype=np.uint8).reshape((height, width, 4))
+        channel, weight = DEPTH_WEIGHTS[0]
+        np.multiply(bgra[:, :, channel], weight, out=self.meters)
+        for channel, weight in DEPTH_WEIGHTS[1:]:
+            np.multiply(bgra[:, :, channel], weight, out=self._work)
+            np.add(self.meters, self._work, out=self.meters)
+        return self.meters
+
+    def gray_linear(self):
+        """Same image as cc.Depth: normalized depth * 255"""
+        np.multiply(self.meters, 255.0 / DEPTH_FAR, out=self._work)
+        np.copyto(self.gray, self._work, casting='unsafe')
+        return self.gray
+
+    def gray_log(self):
+        """Same image as cc.LogarithmicDepth: (1 + log(normalized) / 5.70378) * 255, clipped"""
+        work = self._work
+        np.multiply(self.meters, 1.0 / DEPTH_FAR, out=work)
+        np.maximum(work, np.float32(1e-12), out=work)
+        np.log(work, out=work)
+        np.multiply(work, 1.0 / LOG_DEPTH_DIVISOR, out=work)
+        np.add(work, 1.0, out=work)
+        np.clip(work, 0.0, 1.0, out=work)
+        np.multiply(work, 255.0, out=work)
+        np.copyto(self.gray, work, casting='unsafe')
+        return self.gray
+
+    def gray_rgb(self):
+        """(height, width, 3) view of the last gray image for PreviewSurface.blit_rgb"""
+        return np.broadcast_to(self.gray[:, :, None], self.gray.shape + (3,))
+
+
+# ==============================================================================
+# -- Segmentation --------------------------------------------------------------
+# ==============================================================================
+
+# cc.CityScapesPalette 와 같은 색상 (태그 번호 순서)
+CITYSCAPES_PALETTE = (
+    (0, 0, 0),  # 0 Unlabeled
+    (70, 70, 70),  # 1 Building
+    (100, 40, 40),  # 2 Fence
+    (55, 90, 80),  # 3 Other
+    (220, 20, 60),  # 4 Pedestrian
+    (153, 153, 153),  # 5 Pole
+    (157, 234, 50),  # 6 RoadLine
+    (128, 64, 128),  # 7 Road
+    (244, 35, 232),  # 8 SideWalk
+    (107, 142, 35),  # 9 Vegetation
+    (0, 0, 142),  # 10 Vehicles
+    (102, 102, 156),  # 11 Wall
+    (220, 220, 0),  # 12 TrafficSign
+    (70, 130, 180),  # 13 Sky
+    (81, 0, 81),  # 14 Ground
+    (150, 100, 100),  # 15 Bridge
+    (230, 150, 140),  # 16 RailTrack
+    (180, 165, 180),  # 17 GuardRail
+    (250, 170, 30),  # 18 TrafficLight
+    (110, 190, 160),  # 19 Static
+    (170, 120, 50),  # 20 Dynamic
+    (45, 60, 150),  # 21 Water
+    (145, 170, 100),  # 22 Terrain
+)
+
+_palette_lut = None
+
+
+def palette_lut():
+    """(256, 3) uint8 lookup table label -> CityScapes color, built once"""
+    global _palette_lut
+    if _palette_lut is None:
+        lut = np.zeros((256, 3), dtype=np.uint8)
+        lut[:len(CITYSCAPES_PALETTE)] = CITYSCAPES_PALETTE
+        _palette_lut = lut
+    return _palette_lut
+
+
+def segmentation_labels(raw_data, width, height):
+    """(height, width) uint8 class id view into the raw BGRA buffer (the tag is stored in the red channel)"""
+    return np.frombuffer(raw_data, dtype=np.uint8).reshape((height, width, 4))[:, :, 2]
+
+
+def colorize_labels(labels, out=None):
+    """Label map -> (height, width, 3) RGB CityScapes image through the palette lookup table"""
+    if out is None:
+        out = np.empty(labels.shape + (3,), dtype=np.uint8)
+    return np.take(palette_lut(), labels, axis=0, out=out)
+
+
+class SegmentationDecoder(object):
+    """Reads class ids straight from the raw sensor.camera.semantic_segmentation buffer.
+
+    Replaces image.convert(cc.CityScapesPalette): the label map is a view (no copy) and the palette is only
+    applied into a reused RGB buffer when a preview is drawn.
+    """
+
+    def __init__(self, width, height):
+        self.labels = None
+        self.rgb = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def decode(self, raw_data, width, height):
+        """Returns the (height, width) uint8 label view, valid while raw_data is alive"""
+        self.labels = segmentation_labels(raw_data, width, height)
+        return self.labels
+
+    def colorize(self):
+        if self.rgb.shape[:2] != self.labels.shape:
+            self.rgb = np.zeros(self.labels.shape + (3,), dtype=np.uint8)
+        return colorize_labels(self.labels, self.rgb)
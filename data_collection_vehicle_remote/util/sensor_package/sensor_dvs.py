@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import ShardWriter
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import DEFAULT_SHARD_SIZE
+
+# carla.DVSEvent 레이아웃 (packed, 13 byte), np.bool 대신 np.bool_ 사용
+DVS_EVENT_DTYPE = np.dtype([('x', '<u2'), ('y', '<u2'), ('t', '<i8'), ('pol', np.bool_)])
+# 이벤트 타임스탬프 단위 (ns)
+DVS_TIME_UNIT = 1e-9
+# 샤드 인덱스 codec 이름
+DVS_CODEC = 'dvs'
+
+
+def dvs_events(image):
+    """carla.DVSEventArray -> (N,) DVS_EVENT_DTYPE view of the raw buffer"""
+    return np.frombuffer(image.raw_data, dtype=DVS_EVENT_DTYPE)
+
+
+def decode_events(raw):
+    """(N, 13) uint8 record of DvsStore -> (N,) DVS_EVENT_DTYPE view"""
+    return np.ascontiguousarray(raw).view(DVS_EVENT_DTYPE).reshape(-1)
+
+
+# ==============================================================================
+# -- DvsAccumulator ------------------------------------------------------------
+# ==============================================================================
+
+
+class DvsAccumulator(object):
+    """Keeps the latest DVS events in a preallocated ring and turns time windows into polarity histograms.
+
+    push() copies each callback's events into the ring (oldest events are overwritten once capacity is
+    reached); accumulate() counts the events of the last window seconds per pixel and polarity with one
+    bincount into a reused (2, height, width) histogram, channel 0 negative and 1 positive.
+    """
+
+    def __init__(self, width, height, window=0.05, capacity=1 << 20):
+        self.width = width
+        self.height = height
+        self.window = window
+        self.capacity = capacity
+        self.events = np.zeros(capacity, dtype=DVS_EVENT_DTYPE)
+        self.histogram = np.zeros((2, height, width), dtype=np.int32)
+        self.rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        self._head = 0
+        self._count = 0
+        self._last_t = None
+        self.overwritten = 0
+
+    def push(self, events):
+        n = len(events)
+        if n == 0:
+            return
+        if n > self.capacity:
+            self.overwritten += n - self.capacity
+            events = events[-self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self._head)
+        self.events[self._head:self._head + first] = events[:first]
+        self.events[:n - first] = events[first:]
+        self._head = (self._head + n) % self.capacity
+        self.overwritten += max(0, self._count + n - self.capacity)
+        self._count = min(self._count + n, self.capacity)
+        t = int(events['t'].max())
+        self._last_t = t if self._last_t is None else max(self._last_t, t)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._last_t = None
+
+    def window_events(self, window=None, t_end=None):
+        """Events with t in (t_end - window, t_end], t_end defaults to the newest event"""
+        if self._count == 0:
+            return self.events[:0]
+        window = self.window if window is None else window
+        t_end = self._last_t if t_end is None else t_end
+        t_start = t_end - int(window / DVS_TIME_UNIT)
+        events = self.events[:self._count]
+        t = events['t']
+        return events[(t > t_start) & (t <= t_end)]
+
+    def accumulate(self, window=None, t_end=None):
+        """(2, height, width) int32 event counts of the window (a reused buffer)"""
+        events = self.window_events(window, t_end)
+        size = self.height * self.width
+        index = events['y'].astype(np.int64)
+        index *= self.width
+        index += events['x']
+        index += events['pol'] * size
+        counts = np.bincount(index, minlength=2 * size)
+        np.copyto(self.histogram, counts[:2 * size].reshape(self.histogram.shape), casting='unsafe')
+        return self.histogram
+
+    def render(self):
+        """(height, width, 3) RGB image of the last histogram: blue positive, red negative"""
+        rgb = self.rgb
+        rgb.fill(0)
+        rgb[:, :, 0][self.histogram[0] > 0] = 255
+        rgb[:, :, 2][self.histogram[1] > 0] = 255
+        return rgb
+
+
+# ==============================================================================
+# -- DvsStore ------------------------------------------------------------------
+# ==============================================================================
+
+
+class DvsStore(object):
+    """Records the raw events of one DVS camera into shards as packed 13 byte records (codec 'dvs')"""
+
+    def __init__(self, root, sensor_id, shard_size=DEFAULT_SHARD_SIZE):
+        self.shards = ShardWriter(os.path.join(root, str(sensor_id)), 'dvs', shard_size,
+                                  meta={'kind': 'dvs', 'sensor_id': str(sensor_id),
+                                        'time_unit': DVS_TIME_UNIT})
+
+    def append(self, frame_data):
+        raw = np.frombuffer(frame_data.buffer, dtype=np.uint8).reshape((-1, DVS_EVENT_DTYPE.itemsize))
+        return self.shards.append(frame_data.frame, frame_data.timestamp, raw, raw.shape, raw.dtype,
+                                  codec=DVS_CODEC)
+
+    def close(self):
+        self.shards.close()
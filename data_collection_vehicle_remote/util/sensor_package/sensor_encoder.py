@@ -0,0 +1,312 @@
+import io
+import os
+import zlib
+import struct
+import threading
+import multiprocessing
+
+import numpy as np
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import ShardWriter
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import DEFAULT_SHARD_SIZE
+
+try:
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+except ImportError:
+    # python 3.8 미만은 프레임 버퍼를 pickle 로 전달
+    shared_memory = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_RAW = 'raw'
+CODEC_PNG = 'png'
+CODEC_JPEG = 'jpeg'
+CODEC_LZ4 = 'lz4'
+CODEC_ZSTD = 'zstd'
+
+# 파일 단위 저장시 확장자
+CODEC_EXTENSIONS = {
+    CODEC_RAW: '.npy',
+    CODEC_PNG: '.png',
+    CODEC_JPEG: '.jpg',
+    CODEC_LZ4: '.npy.lz4',
+    CODEC_ZSTD: '.npy.zst',
+}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_FILTER_NONE = 0
+PNG_FILTER_UP = 2
+
+
+def available_codecs():
+    codecs = [CODEC_RAW, CODEC_PNG]
+    if Image is not None:
+        codecs.append(CODEC_JPEG)
+    if lz4_frame is not None:
+        codecs.append(CODEC_LZ4)
+    if zstandard is not None:
+        codecs.append(CODEC_ZSTD)
+    return codecs
+
+
+def check_codec(codec):
+    if codec not in available_codecs():
+        raise RuntimeError('image codec %s is not available (installed: %s)'
+                           % (codec, ', '.join(available_codecs())))
+
+
+def bgra_to_rgb(array):
+    """(h, w, 4) BGRA -> (h, w, 3) RGB view, other arrays are returned as they are"""
+    if array.ndim == 3 and array.shape[2] == 4 and array.dtype == np.uint8:
+        return array[:, :, 2::-1]
+    return array
+
+
+# ==============================================================================
+# -- Codecs --------------------------------------------------------------------
+# ==============================================================================
+
+
+def _npy_bytes(array):
+    out = io.BytesIO()
+    np.save(out, np.ascontiguousarray(array))
+    return out.getvalue()
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(rgb, level=6):
+    """(h, w, 3) or (h, w) uint8 -> PNG bytes. Every row uses the Up filter, computed with one numpy diff"""
+    height, width = rgb.shape[:2]
+    color_type = 2 if rgb.ndim == 3 else 0
+    rows = rgb.reshape((height, -1))
+    filtered = np.empty((height, rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = PNG_FILTER_UP
+    filtered[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return b''.join((PNG_SIGNATURE,
+                     _png_chunk(b'IHDR', header),
+                     _png_chunk(b'IDAT', zlib.compress(filtered.tobytes(), level)),
+                     _png_chunk(b'IEND', b'')))
+
+
+def decode_png(data):
+    """Decodes the PNG written by encode_png (None / Up filtered 8 bit gray or RGB rows)"""
+    offset = len(PNG_SIGNATURE)
+    idat = []
+    width = height = channels = None
+    while offset < len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        chunk = data[offset + 8:offset + 8 + length]
+        if kind == b'IHDR':
+            width, height, _, color_type = struct.unpack('>IIBB', chunk[:10])
+            channels = 3 if color_type == 2 else 1
+        elif kind == b'IDAT':
+            idat.append(chunk)
+        offset += length + 12
+    filtered = np.frombuffer(zlib.decompress(b''.join(idat)), dtype=np.uint8).reshape((height, -1))
+    if not np.isin(filtered[:, 0], (PNG_FILTER_NONE, PNG_FILTER_UP)).all():
+        raise ValueError('unsupported png filter, only png files written by encode_png can be decoded')
+    # Up 필터는 위쪽 행과의 차이이므로 행 방향 누적합 (uint8 overflow 가 mod 256 역할)
+    if (filtered[:, 0] == PNG_FILTER_UP).all():
+        rows = np.cumsum(filtered[:, 1:], axis=0, dtype=np.uint8)
+    else:
+        rows = filtered[:, 1:].copy()
+        for row in range(1, height):
+            if filtered[row, 0] == PNG_FILTER_UP:
+                np.add(rows[row], rows[row - 1], out=rows[row])
+    return rows.reshape((height, width, channels)) if channels == 3 else rows.reshape((height, width))
+
+
+def encode(codec, array, level=6, quality=90):
+    """numpy array -> encoded bytes. png/jpeg encode images as RGB, the other codecs keep the array as .npy"""
+    if codec == CODEC_PNG:
+        return encode_png(np.ascontiguousarray(bgra_to_rgb(array)), level)
+    if codec == CODEC_JPEG:
+        out = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(bgra_to_rgb(array))).save(out, format='JPEG', quality=quality)
+        return out.getvalue()
+    if codec == CODEC_LZ4:
+        return lz4_frame.compress(_npy_bytes(array), compression_level=level)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(_npy_bytes(array))
+    return _npy_bytes(array)
+
+
+def decode(codec, data):
+    """Encoded bytes -> numpy array (RGB for png/jpeg)"""
+    data = bytes(data)
+    if codec == CODEC_PNG:
+        return decode_png(data)
+    if codec == CODEC_JPEG:
+        return np.asarray(Image.open(io.BytesIO(data)))
+    if codec == CODEC_LZ4:
+        data = lz4_frame.decompress(data)
+    elif codec == CODEC_ZSTD:
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return np.load(io.BytesIO(data))
+
+
+def codec_from_path(path):
+    for codec, extension in sorted(CODEC_EXTENSIONS.items(), key=lambda x: -len(x[1])):
+        if path.endswith(extension):
+            return codec
+    return None
+
+
+def _attach_shared(name):
+    """Opens an existing shared memory block without handing it to the resource tracker of this process"""
+    try:
+        # python 3.13 이상
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    block = shared_memory.SharedMemory(name=name)
+    # 블록은 부모 프로세스가 관리하므로 자식 프로세스의 resource_tracker 등록은 해제
+    # (resource_tracker 는 POSIX 에서만 등록함, 등록 이름은 '/' 로 시작)
+    if os.name == 'posix':
+        resource_tracker.unregister('/' + block.name.lstrip('/'), 'shared_memory')
+    return block
+
+
+def _encode_shared(name, shape, dtype, codec, level, quality):
+    """Runs in a pool process: encodes the frame stored in a shared memory block"""
+    block = _attach_shared(name)
+    try:
+        return encode(codec, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf), level, quality)
+    finally:
+        block.close()
+
+
+# ==============================================================================
+# -- ImageEncoder --------------------------------------------------------------
+# ==============================================================================
+
+
+class ImageEncoder(object):
+    """Encoding stage for camera frames.
+
+    encode() is called from the FrameWriter threads. With processes > 0 the frame is copied once into a
+    reusable shared memory block and encoded by a process pool, so PNG/JPEG compression of several frames
+    runs on several cores instead of under one GIL. Blocks are kept and reused (one per frame in flight),
+    only growing when a larger frame arrives.
+    """
+
+    def __init__(self, codec=CODEC_PNG, level=6, quality=90, processes=0):
+        check_codec(codec)
+        self.codec = codec
+        self.level = level
+        self.quality = quality
+        self.processes = processes
+        self.extension = CODEC_EXTENSIONS[codec]
+        self._pool = None
+        self._blocks = []
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def start(self):
+        if self.processes > 0 and self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        with self._lock:
+            blocks, self._blocks = self._blocks, []
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    def _acquire(self, nbytes):
+        with self._lock:
+            for n, block in enumerate(self._blocks):
+                if block.size >= nbytes:
+                    return self._blocks.pop(n)
+        return shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def _release(self, block):
+        with self._lock:
+            self._blocks.append(block)
+
+    def encode(self, array):
+        """numpy array -> encoded bytes"""
+        if self._pool is None:
+            data = encode(self.codec, array, self.level, self.quality)
+        elif shared_memory is None:
+            data = self._pool.apply(encode, (self.codec, np.ascontiguousarray(array), self.level, self.quality))
+        else:
+            block = self._acquire(array.nbytes)
+            try:
+                np.copyto(np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf), array)
+                data = self._pool.apply(_encode_shared, (block.name, array.shape, array.dtype.str, self.codec,
+                                                         self.level, self.quality))
+            finally:
+                self._release(block)
+        with self._lock:
+            self.frames += 1
+            self.bytes_in += array.nbytes
+            self.bytes_out += len(data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                'codec': self.codec,
+                'frames': self.frames,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': (float(self.bytes_in) / self.bytes_out) if self.bytes_out else 0.0,
+            }
+
+
+# ==============================================================================
+# -- ImageStore ----------------------------------------------------------------
+# ==============================================================================
+
+
+class ImageStore(object):
+    """Appends the encoded frames of one camera into segment files (root/sensor_id/image_xxxxx.shard).
+
+    Replaces one file per frame: segments roll over at shard_size and the index keeps frame, timestamp,
+    offset and codec of every frame, so ShardReader can decode them. With the raw codec the BGRA array
+    is stored as it is and read back through the memory map without copies.
+    """
+
+    def __init__(self, root, sensor_id, encoder=None, shard_size=DEFAULT_SHARD_SIZE):
+        self.encoder = encoder if encoder is not None else ImageEncoder(CODEC_PNG)
+        self.shards = ShardWriter(os.path.join(root, str(sensor_id)), 'image', shard_size,
+                                  meta={'kind': 'image', 'sensor_id': str(sensor_id), 'codec': self.encoder.codec})
+
+    def append(self, frame_data):
+        array = frame_data.array()
+        if self.encoder.codec == CODEC_RAW:
+            return self.shards.append(frame_data.frame, frame_data.timestamp, array, array.shape, array.dtype)
+        data = self.encoder.encode(array)
+        # 인덱스의 shape 은 디코딩 결과 기준 (png / jpeg 는 RGB)
+        shape = bgra_to_rgb(array).shape if self.encoder.codec in (CODEC_PNG, CODEC_JPEG) else array.shape
+        return self.shards.append(frame_data.frame, frame_data.timestamp, data, shape, array.dtype,
+                                  codec=self.encoder.codec)
+
+    def close(self):
+        self.shards.close()
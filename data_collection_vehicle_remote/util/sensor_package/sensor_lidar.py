@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import ShardWriter
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import DEFAULT_SHARD_SIZE
+
+INT16_LIMIT = np.iinfo(np.int16).max
+
+
+def quantize_points(points, scale):
+    """float32 points -> int16 (value / scale). Values outside the int16 range are clipped"""
+    quantized = np.empty(points.shape, dtype=np.int16)
+    scaled = np.divide(points, scale, dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -INT16_LIMIT, INT16_LIMIT, out=scaled)
+    np.copyto(quantized, scaled, casting='unsafe')
+    return quantized
+
+
+def dequantize_points(quantized, scale):
+    return quantized.astype(np.float32) * np.float32(scale)
+
+
+# ==============================================================================
+# -- Downsampling --------------------------------------------------------------
+# ==============================================================================
+
+# 복셀 좌표 해시 (축당 21 bit, +-2^20 복셀)
+VOXEL_BITS = 21
+VOXEL_OFFSET = 1 << (VOXEL_BITS - 1)
+VOXEL_MASK = (1 << VOXEL_BITS) - 1
+
+
+def voxel_keys(points, voxel_size):
+    """One int64 key per point packing the x/y/z voxel indices"""
+    voxel = np.floor(points[:, :3] / np.float32(voxel_size)).astype(np.int64)
+    voxel += VOXEL_OFFSET
+    np.bitwise_and(voxel, VOXEL_MASK, out=voxel)
+    keys = voxel[:, 0] << (2 * VOXEL_BITS)
+    keys |= voxel[:, 1] << VOXEL_BITS
+    keys |= voxel[:, 2]
+    return keys
+
+
+def voxel_downsample(points, voxel_size):
+    """Keeps the first point of every occupied voxel_size meter voxel (other channels are kept as they are)"""
+    if len(points) == 0:
+        return points
+    _, first = np.unique(voxel_keys(points, voxel_size), return_index=True)
+    first.sort()
+    return points[first]
+
+
+def random_downsample(points, ratio, random_state=np.random):
+    """Keeps each point with probability ratio"""
+    if ratio >= 1.0:
+        return points
+    return points[random_state.random_sample(len(points)) < ratio]
+
+
+class LidarDownsampler(object):
+    """Ingest stage run on each sweep before it is recorded.
+
+    voxel_size (meters) keeps one point per occupied voxel, ratio keeps a random fraction of the points;
+    when both are set the voxel grid is applied first.
+    """
+
+    def __init__(self, voxel_size=None, ratio=None, seed=None):
+        self.voxel_size = voxel_size
+        self.ratio = ratio
+        self.random_state = np.random.RandomState(seed)
+        self.points_in = 0
+        self.points_out = 0
+
+    def __call__(self, points):
+        self.points_in += len(points)
+        if self.voxel_size:
+            points = voxel_downsample(points, self.voxel_size)
+        if self.ratio is not None:
+            points = random_downsample(points, self.ratio, self.random_state)
+        self.points_out += len(points)
+        return points
+
+
+# ==============================================================================
+# -- BevRasterizer -------------------------------------------------------------
+# ==============================================================================
+
+BEV_HEIGHT = 0
+BEV_DENSITY = 1
+BEV_INTENSITY = 2
+# 밀도 채널 정규화 기준 (셀당 포인트 수, log(1 + n) / log(64))
+BEV_DENSITY_NORM = np.log(64.0)
+
+
+class BevRasterizer(object):
+    """Bins a lidar sweep into a bird's-eye-view grid with height, density and intensity channels.
+
+    The grid covers x_range (forward, row 0 is the far end) by y_range (right, column 0 is the left end)
+    in resolution meter cells. rasterize() fills a reused (3, rows, cols) float32 array:
+    max height above z_range[0] (clipped to z_range), log normalized point count and mean intensity
+    (zero when the sweep has no intensity channel). Points outside the grid are discarded, nothing is
+    folded onto the image.
+    """
+
+    def __init__(self, resolution=0.1, x_range=(-40.0, 40.0), y_range=(-40.0, 40.0), z_range=(-3.0, 3.0)):
+        self.resolution = float(resolution)
+        self.x_range = x_range
+        self.y_range = y_range
+        self.z_range = z_range
+        self.rows = int(round((x_range[1] - x_range[0]) / self.resolution))
+        self.cols = int(round((y_range[1] - y_range[0]) / self.resolution))
+        self.bev = np.zeros((3, self.rows, self.cols), dtype=np.float32)
+        self.rgb = np.zeros((self.rows, self.cols, 3), dtype=np.uint8)
+
+    @staticmethod
+    def for_preview(width, height, lidar_range):
+        """Grid of exactly width x height cells covering +-lidar_range on the shorter side"""
+        resolution = 2.0 * lidar_range / min(width, height)
+        half_x = 0.5 * height * resolution
+        half_y = 0.5 * width * resolution
+        return BevRasterizer(resolution, (-half_x, half_x), (-half_y, half_y))
+
+    def rasterize(self, points):
+        """(N, channels) float32 sweep -> (3, rows, cols) float32 (a reused buffer, copy it to keep it)"""
+        if len(points) == 0:
+            # 빈 스윕은 빈 격자
+            self.bev.fill(0.0)
+            return self.bev
+        size = self.rows * self.cols
+        row = np.floor((self.x_range[1] - points[:, 0]) / self.resolution).astype(np.int64)
+        col = np.floor((points[:, 1] - self.y_range[0]) / self.resolution).astype(np.int64)
+        inside = (row >= 0) & (row < self.rows) & (col >= 0) & (col < self.cols)
+        cell = row[inside] * self.cols + col[inside]
+
+        bev = self.bev.reshape((3, size))
+        count = np.bincount(cell, minlength=size)
+        np.log1p(count, out=bev[BEV_DENSITY])
+        np.minimum(bev[BEV_DENSITY] / BEV_DENSITY_NORM, 1.0, out=bev[BEV_DENSITY])
+
+        # 높이 오름차순으로 정렬 후 대입하면 셀마다 마지막(최대) 값이 남음
+        height = np.clip(points[inside, 2], self.z_range[0], self.z_range[1]) - self.z_range[0]
+        order = np.argsort(height, kind='stable')
+        bev[BEV_HEIGHT].fill(0.0)
+        bev[BEV_HEIGHT][cell[order]] = height[order]
+
+        if points.shape[1] > 3:
+            total = np.bincount(cell, weights=points[inside, 3], minlength=size)
+            np.divide(total, np.maximum(count, 1), out=bev[BEV_INTENSITY], casting='unsafe')
+        else:
+            bev[BEV_INTENSITY].fill(0.0)
+        return self.bev
+
+    def to_rgb(self):
+        """(rows, cols, 3) uint8 image of the last grid: red height, green density, blue intensity"""
+        top = float(self.z_range[1] - self.z_range[0])
+        for channel, norm in ((BEV_HEIGHT, 255.0 / top), (BEV_DENSITY, 255.0), (BEV_INTENSITY, 255.0)):
+            np.copyto(self.rgb[:, :, channel], np.clip(self.bev[channel] * norm, 0.0, 255.0), casting='unsafe')
+        return self.rgb
+
+
+# ==============================================================================
+# -- LidarStore ----------------------------------------------------------------
+# ==============================================================================
+
+
+class LidarStore(object):
+    """Records lidar sweeps of one sensor into shard files instead of one PLY file per sweep.
+
+    With quantize=True the points are stored as int16 multiples of scale meters (0.01 -> 1 cm steps,
+    +-327 m), halving the size of every sweep.
+    """
+
+    def __init__(self, root, sensor_id, shard_size=DEFAULT_SHARD_SIZE, quantize=False, scale=0.01):
+        self.quantize = quantize
+        self.scale = scale if quantize else 1.0
+        self.shards = ShardWriter(os.path.join(root, str(sensor_id)), 'lidar', shard_size,
+                                  meta={'kind': 'lidar', 'sensor_id': str(sensor_id),
+                                        'quantize': quantize, 'scale': self.scale})
+
+    def append(self, frame_data):
+        points = frame_data.array()
+        if self.quantize:
+            points = quantize_points(points, self.scale)
+        return self.shards.append(frame_data.frame, frame_data.timestamp, points, points.shape, points.dtype,
+                                  scale=self.scale)
+
+    def close(self):
+        self.shards.close()
@@ -0,0 +1,181 @@
+import math
+import time
+import sqlite3
+import threading
+
+MANIFEST_NAME = 'manifest.sqlite'
+
+# 날씨는 RPC 이므로 시뮬레이션 시간 기준 주기적으로만 갱신 (초)
+WEATHER_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    frame INTEGER NOT NULL,
+    sim_time REAL,
+    wall_time REAL,
+    sensor_id TEXT NOT NULL,
+    kind TEXT,
+    file TEXT,
+    offset INTEGER,
+    nbytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS frames_frame ON frames (frame);
+CREATE INDEX IF NOT EXISTS frames_sensor ON frames (sensor_id, frame);
+
+CREATE TABLE IF NOT EXISTS poses (
+    frame INTEGER PRIMARY KEY,
+    sim_time REAL,
+    wall_time REAL,
+    x REAL, y REAL, z REAL,
+    pitch REAL, yaw REAL, roll REAL,
+    vx REAL, vy REAL, vz REAL,
+    speed REAL,
+    road_id INTEGER,
+    lane_id INTEGER,
+    cloudiness REAL,
+    precipitation REAL,
+    precipitation_deposits REAL,
+    wind_intensity REAL,
+    fog_density REAL,
+    wetness REAL,
+    sun_altitude_angle REAL
+);
+CREATE INDEX IF NOT EXISTS poses_speed ON poses (speed);
+CREATE INDEX IF NOT EXISTS poses_precipitation ON poses (precipitation);
+"""
+
+FRAME_COLUMNS = 8
+POSE_COLUMNS = 22
+
+
+# ==============================================================================
+# -- SessionManifest -----------------------------------------------------------
+# ==============================================================================
+
+
+class SessionManifest(object):
+    """SQLite index of a recording session: one row per written sensor frame and one ego pose per sim frame.
+
+    Rows are buffered and inserted in batches (every commit_rows rows and on flush/close), so the sensor
+    writer threads and the world tick callback only append to a list. Frames join poses on the frame
+    column, e.g. all camera frames above 50 km/h in rain:
+
+        SELECT f.file, f.offset FROM frames f JOIN poses p ON p.frame = f.frame
+        WHERE f.sensor_id = 'a-0' AND p.speed > 50 AND p.precipitation > 30
+    """
+
+    def __init__(self, path, commit_rows=512):
+        self.path = path
+        self.commit_rows = commit_rows
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._frames = []
+        self._poses = []
+
+    def add_frame(self, frame_data, file=None, offset=0, nbytes=0):
+        row = (frame_data.frame, frame_data.timestamp, time.time(), frame_data.sensor_id, frame_data.kind,
+               file if file is not None else frame_data.path, offset, nbytes)
+        with self._lock:
+            if self._connection is None:
+                return
+            self._frames.append(row)
+            if len(self._frames) >= self.commit_rows:
+                self._commit()
+
+    def add_pose(self, frame, sim_time, transform, velocity, waypoint=None, weather=None):
+        location = transform.location
+        rotation = transform.rotation
+        row = [frame, sim_time, time.time(),
+               location.x, location.y, location.z,
+               rotation.pitch, rotation.yaw, rotation.roll,
+               velocity.x, velocity.y, velocity.z,
+               3.6 * math.sqrt(velocity.x ** 2 + velocity.y ** 2 + velocity.z ** 2)]
+        row += [waypoint.road_id, waypoint.lane_id] if waypoint is not None else [None, None]
+        if weather is not None:
+            row += [weather.cloudiness, weather.precipitation, weather.precipitation_deposits,
+                    weather.wind_intensity, weather.fog_density, weather.wetness, weather.sun_altitude_angle]
+        else:
+            row += [None] * 7
+        with self._lock:
+            # close() 직전에 시작된 tick 콜백이나 writer 스레드의 늦은 호출은 무시
+            if self._connection is None:
+                return
+            self._poses.append(tuple(row))
+            if len(self._poses) >= self.commit_rows:
+                self._commit()
+
+    def _commit(self):
+        frames, self._frames = self._frames, []
+        poses, self._poses = self._poses, []
+        with self._connection:
+            if frames:
+                self._connection.executemany(
+                    'INSERT INTO frames VALUES (%s)' % ','.join('?' * FRAME_COLUMNS), frames)
+            if poses:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO poses VALUES (%s)' % ','.join('?' * POSE_COLUMNS), poses)
+
+    def flush(self):
+        with self._lock:
+            if self._connection is not None:
+                self._commit()
+
+    def query(self, sql, parameters=()):
+        """Runs a read query on the committed rows"""
+        self.flush()
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._connection is None:
+                return
+            self._commit()
+            self._connection.close()
+            self._connection = None
+
+
+# ==============================================================================
+# -- PoseRecorder --------------------------------------------------------------
+# ==============================================================================
+
+
+class PoseRecorder(object):
+    """Adds the ego pose of every simulation frame to a SessionManifest from world.on_tick.
+
+    Transform and velocity come from the world snapshot (no extra RPC per frame); the weather is
+    refreshed every WEATHER_INTERVAL seconds of simulation time.
+    """
+
+    def __init__(self, world, vehicle, manifest):
+        self.world = world
+        self.vehicle = vehicle
+        self.manifest = manifest
+        self.town_map = world.get_map()
+        self._weather = world.get_weather()
+        self._weather_time = None
+        self._callback_id = None
+
+    def start(self):
+        if self._callback_id is None:
+            self._callback_id = self.world.on_tick(self._on_tick)
+
+    def stop(self):
+        if self._callback_id is not None:
+            self.world.remove_on_tick(self._callback_id)
+            self._callback_id = None
+
+    def _on_tick(self, snapshot):
+        actor = snapshot.find(self.vehicle.id)
+        if actor is None:
+            return
+        sim_time = snapshot.timestamp.elapsed_seconds
+        if self._weather_time is None or sim_time - self._weather_time >= WEATHER_INTERVAL:
+            self._weather = self.world.get_weather()
+            self._weather_time = sim_time
+        transform = actor.get_transform()
+        waypoint = self.town_map.get_waypoint(transform.location)
+        self.manifest.add_pose(snapshot.frame, sim_time, transform, actor.get_velocity(), waypoint, self._weather)
@@ -0,0 +1,146 @@
+import time
+import threading
+
+# 비율(Hz, byte/s) 재계산 최소 주기 (초)
+RATE_INTERVAL = 1.0
+# 지연시간 지수이동평균 계수
+LATENCY_ALPHA = 0.1
+
+
+class _CallbackCounter(object):
+    __slots__ = ('count', 'latency', 'latency_max', 'last_count', 'rate')
+
+    def __init__(self):
+        self.count = 0
+        self.latency = 0.0
+        self.latency_max = 0.0
+        self.last_count = 0
+        self.rate = 0.0
+
+
+# ==============================================================================
+# -- SensorMetrics -------------------------------------------------------------
+# ==============================================================================
+
+
+class SensorMetrics(object):
+    """Data collection health: callback rate and latency per sensor, queue depth, drops and bytes/s per stream.
+
+    on_callback() is called by the SensorWorkers for every measurement (only counters are updated there).
+    The latency is the wall time between the server tick of the measurement and its callback: on_world_tick()
+    keeps the latest (simulation time, wall time) pair, so a measurement taken at simulation time t is
+    expected at wall_tick + (t - sim_tick). Rates are recomputed at most every RATE_INTERVAL seconds
+    by snapshot(), so the HUD and other readers can call it every frame.
+    """
+
+    def __init__(self, writer=None, workers=None):
+        self.writer = writer
+        self.workers = workers if workers is not None else {}
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._tick = None
+        self._rate_time = None
+        self._written = {}
+        self._streams = {}
+        self._snapshot = None
+
+    def on_world_tick(self, snapshot):
+        self._tick = (snapshot.timestamp.elapsed_seconds, time.time())
+
+    def on_callback(self, name, timestamp):
+        now = time.time()
+        tick = self._tick
+        with self._lock:
+            counter = self._callbacks.get(name)
+            if counter is None:
+                counter = self._callbacks[name] = _CallbackCounter()
+            counter.count += 1
+            if tick is not None:
+                latency = max(0.0, now - (tick[1] + timestamp - tick[0]))
+                counter.latency += LATENCY_ALPHA * (latency - counter.latency)
+                counter.latency_max = max(counter.latency_max, latency)
+
+    def reset(self):
+        with self._lock:
+            self._callbacks = {}
+            self._written = {}
+            self._streams = {}
+            self._rate_time = None
+            self._snapshot = None
+
+    def _update_rates(self, now):
+        # 첫 호출은 기준값만 저장 (비율 0)
+        dt = (now - self._rate_time) if self._rate_time is not None else None
+        self._rate_time = now
+        for counter in self._callbacks.values():
+            counter.rate = (counter.count - counter.last_count) / dt if dt else 0.0
+            counter.last_count = counter.count
+        writer_stats = self.writer.stats() if self.writer is not None else {}
+        streams = {}
+        for sensor_id, stats in writer_stats.items():
+            written, bytes_written = self._written.get(sensor_id, (stats['written'], stats['bytes_written']))
+            stream = dict(stats)
+            stream['frame_rate'] = (stats['written'] - written) / dt if dt else 0.0
+            stream['byte_rate'] = (stats['bytes_written'] - bytes_written) / dt if dt else 0.0
+            streams[sensor_id] = stream
+            self._written[sensor_id] = (stats['written'], stats['bytes_written'])
+        self._streams = streams
+
+    def snapshot(self):
+        """
+        Machine readable state:
+        {'time', 'sensors': {name: {rate, latency, latency_max, count, depth, dropped, errors}},
+         'streams': {sensor_id: {frame_rate, byte_rate, depth, capacity, dropped, ...}},
+         'queue_depth', 'dropped', 'byte_rate', 'errors'}
+        """
+        now = time.time()
+        with self._lock:
+            if self._rate_time is None or now - self._rate_time >= RATE_INTERVAL:
+                self._update_rates(now)
+            elif self._snapshot is not None:
+                return self._snapshot
+
+            sensors = {}
+            for name, counter in self._callbacks.items():
+                sensors[name] = {
+                    'rate': counter.rate,
+                    'latency': counter.latency,
+                    'latency_max': counter.latency_max,
+                    'count': counter.count,
+                }
+            for name, worker in list(self.workers.items()):
+                stats = worker.stats()
+                sensor = sensors.setdefault(name, {'rate': 0.0, 'latency': 0.0, 'latency_max': 0.0, 'count': 0})
+                sensor['depth'] = stats['depth']
+                sensor['dropped'] = stats['dropped']
+                sensor['errors'] = worker.errors
+
+            streams = self._streams
+            self._snapshot = {
+                'time': now,
+                'sensors': sensors,
+                'streams': streams,
+                'queue_depth': sum(x['depth'] for x in streams.values()),
+                'dropped': sum(x['dropped'] for x in streams.values()) +
+                           sum(x.get('dropped', 0) for x in sensors.values()),
+                'byte_rate': sum(x['byte_rate'] for x in streams.values()),
+                'errors': (self.writer.errors if self.writer is not None else 0) +
+                          sum(x.get('errors', 0) for x in sensors.values()),
+            }
+            return self._snapshot
+
+    def hud_lines(self):
+        """HUD panel lines (no_rendering_hud.HUD.add_info): one rate/latency line and one queue bar per sensor"""
+        state = self.snapshot()
+        lines = []
+        for name, sensor in sorted(state['sensors'].items()):
+            lines.append('%-8s %5.1fHz %5dms' % (name[:8], sensor['rate'], int(sensor['latency'] * 1000)))
+        for sensor_id, stream in sorted(state['streams'].items()):
+            lines.append(('%-5s %5.1fMB/s' % (sensor_id[:5], stream['byte_rate'] / 1e6),
+                          float(stream['depth']), 0.0, float(max(1, stream['capacity']))))
+        lines.append('Written: %11.1f MB/s' % (state['byte_rate'] / 1e6))
+        # 프레임 손실이나 오류가 있는 경우 눈에 띄도록 표시
+        lines.append('Dropped: %9d%s' % (state['dropped'], '  (!)' if state['dropped'] else ''))
+        if state['errors']:
+            lines.append('Errors:  %9d  (!)' % state['errors'])
+        return lines
@@ -0,0 +1,76 @@
+import numpy as np
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_lidar import BevRasterizer
+
+try:
+    import pygame
+except ImportError:
+    raise RuntimeError('cannot import pygame, make sure pygame package is installed')
+
+
+# ==============================================================================
+# -- PreviewSurface ------------------------------------------------------------
+# ==============================================================================
+
+
+class PreviewSurface(object):
+    """Persistent pygame surface that sensor callbacks update in place.
+
+    The RGB staging array (surfarray layout, width x height x 3) and two surfaces are allocated once;
+    each frame is copied through numpy views and blitted with surfarray.blit_array into the surface
+    that is not being displayed, so a frame costs no new arrays or surfaces and the render thread never
+    blits a surface that is locked by the callback thread.
+    """
+
+    def __init__(self, width, height):
+        self.dim = (0, 0)
+        self.surface = None
+        self.array = None
+        self._surfaces = None
+        self._back = 0
+        self._resize(width, height)
+
+    def _resize(self, width, height):
+        if self.dim != (width, height):
+            self.dim = (width, height)
+            self._surfaces = [pygame.Surface(self.dim), pygame.Surface(self.dim)]
+            self.array = np.zeros((width, height, 3), dtype=np.uint8)
+
+    def publish(self):
+        """Uploads self.array to the back surface and swaps it to the front"""
+        surface = self._surfaces[self._back]
+        pygame.surfarray.blit_array(surface, self.array)
+        self._back = 1 - self._back
+        self.surface = surface
+        return surface
+
+    def blit_rgb(self, rgb):
+        """Copies an (height, width, 3) RGB view into the surface"""
+        self._resize(rgb.shape[1], rgb.shape[0])
+        np.copyto(self.array, rgb.swapaxes(0, 1))
+        return self.publish()
+
+    def blit_bgra(self, raw_data, width, height):
+        """Copies a CARLA BGRA buffer (carla.Image.raw_data) into the surface"""
+        bgra = np.frombuffer(raw_data, dtype=np.uint8).reshape((height, width, 4))
+        return self.blit_rgb(bgra[:, :, 2::-1])
+
+
+# ==============================================================================
+# -- LidarPreview --------------------------------------------------------------
+# ==============================================================================
+
+
+class LidarPreview(PreviewSurface):
+    """Bird's-eye view of a lidar sweep (BevRasterizer channels as RGB) drawn into a preallocated image"""
+
+    def __init__(self, width, height, lidar_range):
+        super(LidarPreview, self).__init__(width, height)
+        self.rasterizer = BevRasterizer.for_preview(width, height, lidar_range)
+
+    def blit_points(self, points):
+        """Rasterizes an (N, channels) float32 point array, forward is up. An empty sweep keeps the last image"""
+        if len(points) == 0:
+            return self.surface
+        self.rasterizer.rasterize(points)
+        return self.blit_rgb(self.rasterizer.to_rgb())
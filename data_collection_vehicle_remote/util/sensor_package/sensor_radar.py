@@ -0,0 +1,87 @@
+import numpy as np
+
+import carla
+
+# raw_data 열 순서 [velocity, altitude, azimuth, depth]
+RADAR_VELOCITY = 0
+RADAR_ALTITUDE = 1
+RADAR_AZIMUTH = 2
+RADAR_DEPTH = 3
+
+
+def radar_points(measurement):
+    """carla.RadarMeasurement -> (N, 4) float32 view [velocity, altitude, azimuth, depth]"""
+    points = np.frombuffer(measurement.raw_data, dtype=np.dtype('f4'))
+    return np.reshape(points, (len(measurement), 4))
+
+
+def radar_world_points(points, transform, depth_offset=0.25):
+    """World positions (N, 3) of the detections seen from the sensor transform.
+
+    Same result as rotating Vector3D(x=depth - depth_offset) by the sensor rotation plus the detection
+    altitude/azimuth, for every detection at once. depth_offset pulls the dots slightly towards the sensor
+    so they stay visible.
+    """
+    rotation = transform.rotation
+    pitch = np.radians(rotation.pitch) + points[:, RADAR_ALTITUDE]
+    yaw = np.radians(rotation.yaw) + points[:, RADAR_AZIMUTH]
+    distance = points[:, RADAR_DEPTH] - depth_offset
+    cos_pitch = np.cos(pitch)
+    location = transform.location
+    world = np.empty((points.shape[0], 3), dtype=np.float32)
+    world[:, 0] = location.x + distance * cos_pitch * np.cos(yaw)
+    world[:, 1] = location.y + distance * cos_pitch * np.sin(yaw)
+    world[:, 2] = location.z + distance * np.sin(pitch)
+    return world
+
+
+def radar_velocity_colors(points, velocity_range):
+    """(N, 3) uint8 colors: red approaching, white static, blue moving away"""
+    norm_velocity = points[:, RADAR_VELOCITY] / velocity_range  # range [-1, 1]
+    colors = np.empty((points.shape[0], 3), dtype=np.uint8)
+    colors[:, 0] = np.clip(1.0 - norm_velocity, 0.0, 1.0) * 255.0
+    colors[:, 1] = np.clip(1.0 - np.abs(norm_velocity), 0.0, 1.0) * 255.0
+    colors[:, 2] = np.abs(np.clip(-1.0 - norm_velocity, -1.0, 0.0)) * 255.0
+    return colors
+
+
+# ==============================================================================
+# -- RadarDrawer ---------------------------------------------------------------
+# ==============================================================================
+
+
+class RadarDrawer(object):
+    """Draws radar detections with world.debug at a limited rate and point budget.
+
+    Every draw_point is one RPC, so measurements closer than interval seconds (simulation time) to the
+    last drawn one are skipped and at most max_points detections are drawn per measurement.
+    """
+
+    def __init__(self, debug, velocity_range, interval=0.1, max_points=200, size=0.075):
+        self.debug = debug
+        self.velocity_range = velocity_range
+        self.interval = interval
+        self.max_points = max_points
+        self.size = size
+        self.enabled = True
+        self._last_draw = None
+
+    def draw(self, points, transform, timestamp):
+        if not self.enabled or len(points) == 0:
+            return
+        if self._last_draw is not None and 0.0 <= timestamp - self._last_draw < self.interval:
+            return
+        self._last_draw = timestamp
+
+        if self.max_points and len(points) > self.max_points:
+            points = points[::int(np.ceil(len(points) / float(self.max_points)))]
+        world = radar_world_points(points, transform).tolist()
+        colors = radar_velocity_colors(points, self.velocity_range).tolist()
+        life_time = max(0.06, self.interval)
+        for (x, y, z), (r, g, b) in zip(world, colors):
+            self.debug.draw_point(
+                carla.Location(x, y, z),
+                size=self.size,
+                life_time=life_time,
+                persistent_lines=False,
+                color=carla.Color(r, g, b))
@@ -0,0 +1,154 @@
+import time
+import threading
+
+
+class _StreamRate(object):
+    __slots__ = ('target', 'scale', 'period', 'next_time', 'last_time', 'admitted', 'skipped', 'dropped')
+
+    def __init__(self, target=None):
+        self.target = target
+        self.scale = 1.0
+        # 목표 주기가 없는 경우 입력 주기 추정값 사용
+        self.period = None
+        self.next_time = None
+        self.last_time = None
+        self.admitted = 0
+        self.skipped = 0
+        self.dropped = 0
+
+
+# ==============================================================================
+# -- RateController ------------------------------------------------------------
+# ==============================================================================
+
+
+class RateController(object):
+    """Per sensor recording rates by frame decimation, optionally adapted to the writer load.
+
+    admit() decides on the simulation timestamp of each frame: a stream with a target rate (Hz) keeps one
+    frame per 1 / (target * scale) seconds, without accumulating drift. In adaptive mode poll() reads the
+    FrameWriter stats every interval seconds and halves the scale of a stream whose buffer is filled above
+    high_water or that dropped frames (all streams when the written bytes/s exceed max_byte_rate), and raises
+    it again by increase per interval while the buffer stays below low_water. Streams without a target rate
+    are only decimated by the adaptive scale, relative to their measured input rate.
+    """
+
+    def __init__(self, rates=None, adaptive=False, high_water=0.5, low_water=0.1, max_byte_rate=None,
+                 interval=1.0, min_scale=0.1, increase=0.1):
+        self.adaptive = adaptive
+        self.high_water = high_water
+        self.low_water = low_water
+        self.max_byte_rate = max_byte_rate
+        self.interval = interval
+        self.min_scale = min_scale
+        self.increase = increase
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._next_poll = None
+        self._bytes_written = None
+        self.byte_rate = 0.0
+        for sensor_id, rate in (rates or {}).items():
+            self.set_rate(sensor_id, rate)
+
+    def _stream(self, sensor_id):
+        stream = self._streams.get(sensor_id)
+        if stream is None:
+            stream = self._streams[sensor_id] = _StreamRate()
+        return stream
+
+    def set_rate(self, sensor_id, rate=None):
+        """Target recording rate of a stream in Hz, None records every frame"""
+        with self._lock:
+            stream = self._stream(str(sensor_id))
+            stream.target = float(rate) if rate else None
+            stream.next_time = None
+
+    def rate(self, sensor_id):
+        """Current effective rate in Hz (None when every frame is recorded)"""
+        with self._lock:
+            stream = self._streams.get(str(sensor_id))
+            if stream is None:
+                return None
+            return self._effective_rate(stream)
+
+    @staticmethod
+    def _effective_rate(stream):
+        if stream.target is not None:
+            return stream.target * stream.scale
+        if stream.scale < 1.0 and stream.period:
+            return stream.scale / stream.period
+        return None
+
+    def admit(self, sensor_id, timestamp):
+        """True when the frame taken at timestamp (simulation seconds) should be recorded"""
+        with self._lock:
+            stream = self._stream(sensor_id)
+            if stream.last_time is not None and timestamp > stream.last_time:
+                delta = timestamp - stream.last_time
+                if stream.period is None:
+                    stream.period = delta
+                elif delta < 4.0 * stream.period:
+                    # 녹화 재시작 등 큰 간격은 입력 주기 추정에서 제외
+                    stream.period += 0.1 * (delta - stream.period)
+            stream.last_time = timestamp
+
+            rate = self._effective_rate(stream)
+            if rate is None:
+                stream.admitted += 1
+                return True
+            period = 1.0 / rate
+            # 입력 주기의 절반 이내 오차는 허용 (20Hz 센서 -> 10Hz 에서 한 프레임씩 건너뜀)
+            tolerance = 0.5 * stream.period if stream.period else 0.0
+            if stream.next_time is not None and timestamp + tolerance < stream.next_time:
+                stream.skipped += 1
+                return False
+            if stream.next_time is None or timestamp - stream.next_time >= period:
+                stream.next_time = timestamp + period
+            else:
+                stream.next_time += period
+            stream.admitted += 1
+            return True
+
+    def poll(self, stats):
+        """Adapts the scales every interval seconds. stats is FrameWriter.stats (called only when due)"""
+        if not self.adaptive:
+            return
+        now = time.time()
+        with self._lock:
+            if self._next_poll is not None and now < self._next_poll:
+                return
+            self._next_poll = now + self.interval
+        self.update(stats(), now)
+
+    def update(self, stats, now=None):
+        """Applies one adaptation step from {sensor_id: RingBuffer.stats()}"""
+        now = time.time() if now is None else now
+        with self._lock:
+            bytes_written = sum(x['bytes_written'] for x in stats.values())
+            if self._bytes_written is not None:
+                elapsed = now - self._bytes_written[1]
+                if elapsed > 0:
+                    self.byte_rate = (bytes_written - self._bytes_written[0]) / elapsed
+            self._bytes_written = (bytes_written, now)
+            overloaded = self.max_byte_rate is not None and self.byte_rate > self.max_byte_rate
+
+            for sensor_id, buffer_stats in stats.items():
+                stream = self._stream(sensor_id)
+                fill = float(buffer_stats['depth']) / max(1, buffer_stats['capacity'])
+                dropped = buffer_stats['dropped'] - stream.dropped
+                stream.dropped = buffer_stats['dropped']
+                if overloaded or dropped > 0 or fill >= self.high_water:
+                    stream.scale = max(self.min_scale, stream.scale * 0.5)
+                elif fill <= self.low_water and stream.scale < 1.0:
+                    stream.scale = min(1.0, stream.scale + self.increase)
+
+    def stats(self):
+        """{sensor_id: {target, rate, scale, admitted, skipped}}"""
+        with self._lock:
+            return dict((sensor_id, {
+                'target': stream.target,
+                'rate': self._effective_rate(stream),
+                'scale': stream.scale,
+                'admitted': stream.admitted,
+                'skipped': stream.skipped,
+            }) for sensor_id, stream in self._streams.items())
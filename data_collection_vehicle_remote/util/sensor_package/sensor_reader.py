@@ -0,0 +1,293 @@
+import os
+import re
+import json
+
+import numpy as np
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import INDEX_DTYPE
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import index_path
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import meta_path
+from data_collection_vehicle_remote.util.sensor_package.sensor_shard import shard_path
+from data_collection_vehicle_remote.util.sensor_package.sensor_dvs import DVS_CODEC
+from data_collection_vehicle_remote.util.sensor_package.sensor_dvs import decode_events
+from data_collection_vehicle_remote.util.sensor_package.sensor_encoder import codec_from_path
+from data_collection_vehicle_remote.util.sensor_package.sensor_encoder import decode
+from data_collection_vehicle_remote.util.sensor_package.sensor_telemetry import COLUMNS_FILE
+from data_collection_vehicle_remote.util.sensor_package.sensor_telemetry import read_telemetry
+
+FRAME_FILE = re.compile(r'^(\d{8})\.(png|jpg|npy|npz|ply|npy\.lz4|npy\.zst)$')
+
+
+# ==============================================================================
+# -- ShardReader ---------------------------------------------------------------
+# ==============================================================================
+
+
+class ShardReader(object):
+    """Random access to the records of a ShardWriter through memory-mapped shards.
+
+    Only the index is loaded into memory. read() returns a numpy view straight into the mapped shard, so
+    nothing is copied until the caller touches the data (quantized records are dequantized into a new
+    float32 array, encoded images are decoded).
+    """
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.meta = {}
+        if os.path.isfile(meta_path(directory, name)):
+            with open(meta_path(directory, name)) as f:
+                self.meta = json.load(f)
+
+        index = np.fromfile(index_path(directory, name), dtype=INDEX_DTYPE)
+        # 프레임 순 정렬, 같은 프레임이 여러번 기록된 경우 마지막 레코드 사용
+        order = np.argsort(index['frame'], kind='stable')
+        index = index[order]
+        keep = np.ones(len(index), dtype=bool)
+        keep[:-1] = index['frame'][1:] != index['frame'][:-1]
+        self.index = index[keep]
+        self.frames = self.index['frame']
+        self.timestamps = self.index['timestamp']
+        self._rows = dict(zip(self.frames.tolist(), range(len(self.index))))
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, frame):
+        return frame in self._rows
+
+    def __iter__(self):
+        """Streams (frame, timestamp, array) in frame order"""
+        for row in range(len(self.index)):
+            yield int(self.frames[row]), float(self.timestamps[row]), self.read_row(row)
+
+    def _map(self, shard):
+        array = self._maps.get(shard)
+        if array is None:
+            array = np.memmap(shard_path(self.directory, self.name, shard), dtype=np.uint8, mode='r')
+            self._maps[shard] = array
+        return array
+
+    def raw_row(self, row):
+        """Bytes of a record as a uint8 view into the mapped shard"""
+        record = self.index[row]
+        offset = int(record['offset'])
+        return self._map(int(record['shard']))[offset:offset + int(record['nbytes'])]
+
+    def read_row(self, row):
+        record = self.index[row]
+        codec = record['codec'].decode('ascii')
+        if codec not in ('raw', DVS_CODEC):
+            # ImageStore 로 인코딩된 프레임
+            return decode(codec, self.raw_row(row))
+        shape = tuple(int(x) for x in record['shape'][:record['ndim']])
+        array = self.raw_row(row).view(np.dtype('<' + record['dtype'].decode('ascii'))).reshape(shape)
+        if codec == DVS_CODEC:
+            return decode_events(array)
+        if record['scale'] != 1.0:
+            array = array.astype(np.float32) * record['scale']
+        return array
+
+    def read(self, frame):
+        """O(1) access by simulation frame. Raises KeyError if the frame was not recorded"""
+        return self.read_row(self._rows[frame])
+
+    def rows_between(self, t0, t1):
+        """Rows whose timestamp lies in [t0, t1]"""
+        start = np.searchsorted(self.timestamps, t0, side='left')
+        stop = np.searchsorted(self.timestamps, t1, side='right')
+        return range(start, stop)
+
+    def between(self, t0, t1):
+        """Streams (frame, timestamp, array) recorded between the simulation times t0 and t1"""
+        for row in self.rows_between(t0, t1):
+            yield int(self.frames[row]), float(self.timestamps[row]), self.read_row(row)
+
+    def close(self):
+        self._maps = {}
+
+
+# ==============================================================================
+# -- FileReader ----------------------------------------------------------------
+# ==============================================================================
+
+
+class FileReader(object):
+    """Same interface as ShardReader for directories with one %08d.<ext> file per frame"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = {}
+        files = {}
+        for name in os.listdir(directory):
+            match = FRAME_FILE.match(name)
+            if match:
+                files[int(match.group(1))] = name
+        self.frames = np.array(sorted(files), dtype=np.int64)
+        self.timestamps = np.full(len(self.frames), np.nan)
+        self._files = files
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, frame):
+        return frame in self._files
+
+    def __iter__(self):
+        for frame in self.frames.tolist():
+            yield frame, float('nan'), self.read(frame)
+
+    def read(self, frame):
+        path = os.path.join(self.directory, self._files[frame])
+        if path.endswith('.npy'):
+            return np.load(path, mmap_mode='r')
+        if path.endswith('.npz'):
+            return np.load(path)
+        if path.endswith('.ply'):
+            return _read_ply(path)
+        if path.endswith('.png'):
+            return _read_png(path)
+        # ImageEncoder 로 저장한 jpg / lz4 / zstd 파일
+        with open(path, 'rb') as f:
+            return decode(codec_from_path(path), f.read())
+
+    def close(self):
+        pass
+
+
+# ==============================================================================
+# -- TelemetryReader -----------------------------------------------------------
+# ==============================================================================
+
+
+class TelemetryReader(object):
+    """Same interface as ShardReader for a TelemetryLog directory (IMU, GNSS column files).
+
+    Every column is memory mapped (read_telemetry), so opening a long session reads nothing but
+    columns.json. read() returns the sample values of a frame in column order; columns holds the whole
+    mapped column arrays by name for vectorized access (e.g. reader.columns['ax']).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = read_telemetry(directory)
+        self.names = [name for name in self.columns if name not in ('frame', 'timestamp')]
+        self.meta = {'kind': 'telemetry', 'columns': self.names}
+        self.frames = self.columns['frame']
+        self.timestamps = self.columns['timestamp']
+        # 같은 프레임의 샘플이 여러개인 경우 마지막 샘플 사용
+        self._rows = dict(zip(self.frames.tolist(), range(len(self.frames))))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, frame):
+        return frame in self._rows
+
+    def __iter__(self):
+        for row in range(len(self.frames)):
+            yield int(self.frames[row]), float(self.timestamps[row]), self.read_row(row)
+
+    def read_row(self, row):
+        return np.array([self.columns[name][row] for name in self.names])
+
+    def read(self, frame):
+        """Sample values of a frame in column order. Raises KeyError if the frame was not recorded"""
+        return self.read_row(self._rows[frame])
+
+    def rows_between(self, t0, t1):
+        """Rows whose timestamp lies in [t0, t1] (samples are logged in time order)"""
+        start = np.searchsorted(self.timestamps, t0, side='left')
+        stop = np.searchsorted(self.timestamps, t1, side='right')
+        return range(start, stop)
+
+    def between(self, t0, t1):
+        for row in self.rows_between(t0, t1):
+            yield int(self.frames[row]), float(self.timestamps[row]), self.read_row(row)
+
+    def close(self):
+        self.columns = {}
+
+
+def _read_png(path):
+    # 학습 로더에서 pygame 없이 사용할 수 있도록 PNG 를 읽을 때만 import
+    import pygame
+    # (width, height, 3) -> (height, width, 3) RGB
+    return pygame.surfarray.array3d(pygame.image.load(path)).swapaxes(0, 1)
+
+
+def _read_ply(path):
+    with open(path, 'rb') as f:
+        header = []
+        while True:
+            line = f.readline().decode('ascii').strip()
+            header.append(line)
+            if line == 'end_header':
+                break
+        offset = f.tell()
+    if 'binary' not in header[1]:
+        return np.loadtxt(path, skiprows=len(header), dtype=np.float32)
+    count = int([x for x in header if x.startswith('element vertex')][0].split()[-1])
+    channels = len([x for x in header if x.startswith('property')])
+    byteorder = '<' if 'little' in header[1] else '>'
+    return np.memmap(path, dtype=byteorder + 'f4', mode='r', offset=offset, shape=(count, channels))
+
+
+# ==============================================================================
+# -- DatasetReader -------------------------------------------------------------
+# ==============================================================================
+
+
+class DatasetReader(object):
+    """Opens everything SensorManager.recording() wrote below root.
+
+    Sharded stores are found through their index files, IMU / GNSS telemetry logs through their columns.json,
+    other sensor directories are read as one file per frame. Streams are keyed 'sensor_id' (or
+    'sensor_id/name' when a directory holds several stores).
+    """
+
+    def __init__(self, root='sensor'):
+        self.root = root
+        self.streams = {}
+        for directory, _, names in os.walk(root):
+            stream_id = os.path.relpath(directory, root).replace(os.sep, '/')
+            if COLUMNS_FILE in names:
+                self.streams[stream_id] = TelemetryReader(directory)
+                continue
+            stores = [name[:-len('.index')] for name in names if name.endswith('.index')]
+            for name in stores:
+                key = stream_id if len(stores) == 1 else stream_id + '/' + name
+                self.streams[key] = ShardReader(directory, name)
+            if not stores and any(FRAME_FILE.match(name) for name in names):
+                self.streams[stream_id] = FileReader(directory)
+
+    def __getitem__(self, stream_id):
+        return self.streams[stream_id]
+
+    def keys(self):
+        return sorted(self.streams)
+
+    def frames(self):
+        """Union of the recorded frame numbers of every stream"""
+        if not self.streams:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate([stream.frames for stream in self.streams.values()]))
+
+    def at(self, frame):
+        """{stream_id: array} of every stream that recorded the frame"""
+        return dict((key, stream.read(frame)) for key, stream in self.streams.items() if frame in stream)
+
+    def between(self, t0, t1):
+        """Streams (frame, {stream_id: array}) for the frames recorded between the simulation times t0 and t1"""
+        frames = set()
+        for stream in self.streams.values():
+            if isinstance(stream, (ShardReader, TelemetryReader)):
+                rows = stream.rows_between(t0, t1)
+                frames.update(stream.frames[rows.start:rows.stop].tolist())
+        for frame in sorted(frames):
+            yield frame, self.at(frame)
+
+    def close(self):
+        for stream in self.streams.values():
+            stream.close()
@@ -0,0 +1,58 @@
+import carla
+
+
+# ==============================================================================
+# -- RigSpawner ----------------------------------------------------------------
+# ==============================================================================
+
+
+class RigSpawner(object):
+    """Spawns and destroys a whole sensor rig in single batched round trips.
+
+    The blueprint library is fetched once. spawn() builds one SpawnActor(blueprint, transform, parent)
+    command per sensor from the sensor class tables (sensor_class.blueprint() / sensor_class.transform),
+    submits them with one client.apply_batch_sync, looks the actors up with one world.get_actors and only
+    then creates the sensor objects around the existing actors, which attaches the listeners.
+    """
+
+    def __init__(self, client, world):
+        self.client = client
+        self.world = world
+        self.bp_library = world.get_blueprint_library()
+
+    def spawn(self, target, config, specs):
+        """
+        :param specs: [(sensor_class, kwargs), ...], kwargs are passed to the sensor class (select_sensor, ...)
+        :return: the sensor objects in spec order
+        """
+        if not specs:
+            return []
+        commands = []
+        for sensor_class, kwargs in specs:
+            bp = sensor_class.blueprint(self.bp_library, config, kwargs.get('select_sensor', 0))
+            commands.append(carla.command.SpawnActor(bp, sensor_class.transform, target))
+        responses = self.client.apply_batch_sync(commands, False)
+
+        errors = [response.error for response in responses if response.error]
+        if errors:
+            # 일부만 생성된 경우 생성된 센서도 제거
+            self.client.apply_batch([carla.command.DestroyActor(response.actor_id)
+                                     for response in responses if not response.error])
+            raise RuntimeError('sensor rig spawn failed: %s' % errors[0])
+
+        actor_ids = [response.actor_id for response in responses]
+        actors = dict((actor.id, actor) for actor in self.world.get_actors(actor_ids))
+        sensors = []
+        for (sensor_class, kwargs), actor_id in zip(specs, actor_ids):
+            sensors.append(sensor_class(self.world, target, config, actor=actors[actor_id],
+                                        bp_library=self.bp_library, **kwargs))
+        return sensors
+
+    def destroy(self, sensors):
+        """Stops the listeners and destroys the actors of several sensors in one batch"""
+        actors = [sensor.sensorActor for sensor in sensors if sensor.sensorActor is not None]
+        if not actors:
+            return
+        for actor in actors:
+            actor.stop()
+        self.client.apply_batch([carla.command.DestroyActor(actor) for actor in actors])
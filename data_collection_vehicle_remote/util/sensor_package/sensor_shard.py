@@ -0,0 +1,156 @@
+import os
+import glob
+import json
+import threading
+
+import numpy as np
+
+# 기본 샤드 파일 크기 (256 MB)
+DEFAULT_SHARD_SIZE = 256 * 1024 * 1024
+
+# 인덱스 레코드 (레코드 1개 = 프레임 1개)
+INDEX_DTYPE = np.dtype([
+    ('frame', '<i8'),
+    ('timestamp', '<f8'),
+    ('shard', '<i4'),
+    ('offset', '<i8'),
+    ('nbytes', '<i8'),
+    ('ndim', '<i1'),
+    ('shape', '<i4', (3,)),
+    ('dtype', 'S4'),
+    ('codec', 'S8'),
+    ('scale', '<f4'),
+])
+
+SHARD_FORMAT = '%s_%05d.shard'
+INDEX_FORMAT = '%s.index'
+META_FORMAT = '%s.json'
+
+
+def shard_path(directory, name, shard):
+    return os.path.join(directory, SHARD_FORMAT % (name, shard))
+
+
+def index_path(directory, name):
+    return os.path.join(directory, INDEX_FORMAT % name)
+
+
+def meta_path(directory, name):
+    return os.path.join(directory, META_FORMAT % name)
+
+
+# ==============================================================================
+# -- ShardWriter ---------------------------------------------------------------
+# ==============================================================================
+
+
+class ShardWriter(object):
+    """Appends frame records into large fixed-size shard files with a separate offset index.
+
+    Each shard is preallocated to shard_size and filled sequentially; when the next record does not fit a
+    new shard is started and the previous one is truncated to the bytes actually used. The index file
+    holds one INDEX_DTYPE record per frame, so a session of tens of thousands of frames is a handful of
+    shards plus one index instead of one file per frame.
+    """
+
+    def __init__(self, directory, name, shard_size=DEFAULT_SHARD_SIZE, meta=None):
+        self.directory = directory
+        self.name = name
+        self.shard_size = shard_size
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        if meta is not None:
+            with open(meta_path(directory, name), 'w') as f:
+                json.dump(meta, f)
+
+        # 이어서 기록하는 경우 기존 샤드 다음 번호부터 시작
+        self._shard = len(glob.glob(os.path.join(directory, SHARD_FORMAT.replace('%05d', '*') % name))) - 1
+        self._file = None
+        self._offset = 0
+        self._capacity = 0
+        self._index = open(index_path(directory, name), 'ab')
+        self._record = np.zeros(1, dtype=INDEX_DTYPE)
+        # 스레드별 마지막 기록 위치 (세션 manifest 용)
+        self._local = threading.local()
+
+        self.frames = 0
+        self.bytes_written = 0
+
+    def _roll(self, nbytes):
+        self._close_shard()
+        self._shard += 1
+        self._capacity = max(self.shard_size, nbytes)
+        self._file = open(shard_path(self.directory, self.name, self._shard), 'wb+')
+        self._file.truncate(self._capacity)
+        self._offset = 0
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.truncate(self._offset)
+            self._file.close()
+            self._file = None
+
+    def append(self, frame, timestamp, data, shape, dtype, codec='raw', scale=1.0):
+        """Appends one record. data is any bytes-like object (numpy arrays are written without copies)"""
+        view = memoryview(data).cast('B')
+        nbytes = view.nbytes
+        shape = tuple(shape)
+        with self._lock:
+            if self._file is None or self._offset + nbytes > self._capacity:
+                self._roll(nbytes)
+            self._file.seek(self._offset)
+            self._file.write(view)
+
+            record = self._record
+            record['frame'] = frame
+            record['timestamp'] = timestamp
+            record['shard'] = self._shard
+            record['offset'] = self._offset
+            record['nbytes'] = nbytes
+            record['ndim'] = len(shape)
+            record['shape'] = (shape + (0, 0, 0))[:3]
+            record['dtype'] = np.dtype(dtype).str[1:].encode('ascii')
+            record['codec'] = codec.encode('ascii')
+            record['scale'] = scale
+            self._index.write(self._record.tobytes())
+            self._index.flush()
+
+            self._local.location = (shard_path(self.directory, self.name, self._shard), self._offset)
+            self._offset += nbytes
+            self.frames += 1
+            self.bytes_written += nbytes + INDEX_DTYPE.itemsize
+        return nbytes
+
+    @property
+    def last_location(self):
+        """(shard path, offset) of the last record appended by the calling thread"""
+        return getattr(self._local, 'location', (None, 0))
+
+    def close(self):
+        with self._lock:
+            self._close_shard()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+# ==============================================================================
+# -- ArrayStore ----------------------------------------------------------------
+# ==============================================================================
+
+
+class ArrayStore(object):
+    """Records the FrameData arrays of one sensor into shards (root/sensor_id/name_xxxxx.shard)"""
+
+    def __init__(self, root, sensor_id, name, shard_size=DEFAULT_SHARD_SIZE):
+        self.shards = ShardWriter(os.path.join(root, str(sensor_id)), name, shard_size,
+                                  meta={'kind': name, 'sensor_id': str(sensor_id)})
+
+    def append(self, frame_data):
+        array = frame_data.array()
+        return self.shards.append(frame_data.frame, frame_data.timestamp, array, array.shape, array.dtype)
+
+    def close(self):
+        self.shards.close()
@@ -0,0 +1,177 @@
+import os
+import time
+import shutil
+import threading
+
+# 용량 초과 시 동작
+STORAGE_ROTATE = 'rotate'
+STORAGE_PAUSE = 'pause'
+
+SESSION_PREFIX = 'session_'
+SESSION_FORMAT = SESSION_PREFIX + '%Y%m%d_%H%M%S'
+
+# 기본 최소 여유 공간 (1 GB)
+DEFAULT_MIN_FREE = 1024 * 1024 * 1024
+
+
+def directory_size(path):
+    total = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(directory, name))
+            except OSError:
+                pass
+    return total
+
+
+# ==============================================================================
+# -- StorageManager ------------------------------------------------------------
+# ==============================================================================
+
+
+class StorageManager(object):
+    """Keeps the sensor output tree within a quota: one directory per recording session below root.
+
+    begin_session() checks the free disk space (rotating old sessions first if allowed) and creates the
+    session directory. During recording poll() is called from FrameWriter.submit; every interval seconds
+    it adds the bytes written in the session (from the writer stats) to the size of the older sessions,
+    measured once at session start, and checks the free space. When quota or min_free is crossed the
+    session is paused (STORAGE_PAUSE, the default, or when nothing is left to rotate); admit() then refuses
+    new frames instead of letting writes fail on a full disk. Only with STORAGE_ROTATE the oldest sessions
+    are deleted, during recording on a background thread so the sensor threads never wait for the delete.
+    """
+
+    def __init__(self, root='sensor', quota=None, policy=STORAGE_PAUSE, min_free=DEFAULT_MIN_FREE, interval=1.0):
+        if policy not in (STORAGE_ROTATE, STORAGE_PAUSE):
+            raise ValueError('unknown storage policy %s' % policy)
+        self.root = root
+        self.quota = quota
+        self.policy = policy
+        self.min_free = min_free
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_poll = None
+        self._sessions = []
+        self._base_bytes = 0
+        self.session = None
+        self.session_bytes = 0
+        self.older_bytes = 0
+        self.paused = False
+        self.rotated = 0
+        # 이전 세션 삭제 스레드 (poll 에서 시작)
+        self._rotating = None
+
+    def sessions(self):
+        """Session directories below root, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.path.join(self.root, name) for name in os.listdir(self.root)
+                      if name.startswith(SESSION_PREFIX) and os.path.isdir(os.path.join(self.root, name)))
+
+    def free_bytes(self):
+        return shutil.disk_usage(self.root).free
+
+    def begin_session(self, bytes_written=0):
+        """
+        Creates the next session directory and returns its path.
+        bytes_written is the writer's byte counter at this point (session sizes are counted from it).
+        Raises RuntimeError when min_free cannot be met.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        self._wait_rotation()
+        with self._lock:
+            self._sessions = [(path, directory_size(path)) for path in self.sessions()]
+            self.older_bytes = sum(size for _, size in self._sessions)
+            self._base_bytes = bytes_written
+            self.session_bytes = 0
+            self.paused = False
+            self._next_poll = None
+            while self._over_limit():
+                path = self._rotate() if self.policy == STORAGE_ROTATE else None
+                if path is None:
+                    raise RuntimeError('not enough disk space for a recording session (%.1f GB free, %.1f GB used)'
+                                       % (self.free_bytes() / 1e9, self.older_bytes / 1e9))
+                shutil.rmtree(path, ignore_errors=True)
+            path = os.path.join(self.root, time.strftime(SESSION_FORMAT))
+            if os.path.isdir(path):
+                path += '_%d' % len(self._sessions)
+            os.makedirs(path)
+            self.session = path
+        return path
+
+    def end_session(self):
+        self._wait_rotation()
+        with self._lock:
+            session, self.session = self.session, None
+            self.paused = False
+        return session
+
+    def _over_limit(self):
+        if self.quota is not None and self.older_bytes + self.session_bytes > self.quota:
+            return True
+        return self.free_bytes() < self.min_free
+
+    def _rotate(self):
+        """Takes the oldest finished session out of the accounting and returns its path (None when none is left).
+        The caller deletes the directory"""
+        if not self._sessions:
+            return None
+        path, size = self._sessions.pop(0)
+        self.older_bytes -= size
+        self.rotated += 1
+        print("system : 저장 공간 확보를 위해 이전 세션 삭제 (%s, %.1f MB)" % (path, size / 1e6))
+        return path
+
+    def _remove(self, path):
+        shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._rotating = None
+
+    def _wait_rotation(self):
+        rotating = self._rotating
+        if rotating is not None:
+            rotating.join()
+
+    def poll(self, stats):
+        """Checks quota and free space every interval seconds. stats is FrameWriter.stats (called only when due)"""
+        now = time.time()
+        with self._lock:
+            if self.session is None or (self._next_poll is not None and now < self._next_poll):
+                return
+            self._next_poll = now + self.interval
+        bytes_written = sum(x['bytes_written'] for x in stats().values())
+        with self._lock:
+            self.session_bytes = bytes_written - self._base_bytes
+            # 삭제 중에는 여유 공간이 아직 늘지 않았으므로 다음 확인까지 대기
+            if self.paused or self._rotating is not None or not self._over_limit():
+                return
+            path = self._rotate() if self.policy == STORAGE_ROTATE else None
+            if path is None:
+                self.pause()
+                return
+            # 세션 폴더 삭제는 센서 콜백 / writer 스레드를 막지 않도록 별도 스레드에서 수행
+            self._rotating = threading.Thread(target=self._remove, args=(path,), name='StorageRotate')
+            self._rotating.daemon = True
+            self._rotating.start()
+
+    def pause(self):
+        """Stops admitting frames until the next session (also used when a write hits a full disk)"""
+        if not self.paused:
+            self.paused = True
+            print("system : 저장 공간 부족으로 녹화 일시정지 (%s)" % self.session)
+
+    def admit(self):
+        return not self.paused
+
+    def stats(self):
+        return {
+            'session': self.session,
+            'session_bytes': self.session_bytes,
+            'older_bytes': self.older_bytes,
+            'quota': self.quota,
+            'free': self.free_bytes() if os.path.isdir(self.root) else None,
+            'paused': self.paused,
+            'rotated': self.rotated,
+            'rotating': self._rotating is not None,
+        }
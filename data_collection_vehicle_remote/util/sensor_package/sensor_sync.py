@@ -0,0 +1,131 @@
+import time
+import threading
+
+
+# ==============================================================================
+# -- FrameSync -----------------------------------------------------------------
+# ==============================================================================
+
+
+class FrameSync(object):
+    """Latest simulation frame processed per sensor, so a stepping loop can wait for a whole frame.
+
+    notify() is called by the SensorWorkers after each measurement was handled (decoded and submitted);
+    wait() blocks until every given sensor reached the frame.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self._changed = threading.Condition()
+
+    def notify(self, name, frame):
+        with self._changed:
+            if frame > self._frames.get(name, -1):
+                self._frames[name] = frame
+                self._changed.notify_all()
+
+    def frame(self, name):
+        with self._changed:
+            return self._frames.get(name)
+
+    def wait(self, names, frame, timeout=None):
+        """Waits until every sensor in names processed frame. Returns the sensors still missing it"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._changed:
+            while True:
+                missing = [name for name in names if self._frames.get(name, -1) < frame]
+                if not missing:
+                    return missing
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return missing
+                self._changed.wait(remaining)
+
+    def forget(self, name):
+        with self._changed:
+            self._frames.pop(name, None)
+
+
+# ==============================================================================
+# -- SynchronousDriver ---------------------------------------------------------
+# ==============================================================================
+
+
+class SynchronousDriver(object):
+    """Steps the simulation in synchronous mode with frame accurate sensor collection.
+
+    The driver owns world.tick(): each step() advances the server by fixed_delta seconds, applies the route
+    control for the new state (VehicleRouteManager.tick) and waits until every sensor of the SensorManager
+    processed the measurement of that frame. Before ticking it also waits while a writer buffer is filled
+    above high_water, so the ring buffers never overflow and no frame is dropped; the simulation then runs
+    at the rate the server, the sensors and the disk can sustain.
+    """
+
+    def __init__(self, world, sensor_manager=None, route_manager=None, target=None, fixed_delta=0.05,
+                 timeout=2.0, high_water=0.5, traffic_manager=None):
+        self.world = world
+        self.sensor_manager = sensor_manager
+        self.route_manager = route_manager
+        self.target = target
+        self.fixed_delta = fixed_delta
+        self.timeout = timeout
+        self.high_water = high_water
+        self.traffic_manager = traffic_manager
+        self._settings = None
+        self.frame = None
+        self.steps = 0
+        self.late = 0
+        self.writer_wait = 0.0
+
+    def start(self):
+        """Switches the world into synchronous mode (the previous settings are restored by stop())"""
+        if self._settings is not None:
+            return
+        self._settings = self.world.get_settings()
+        settings = self.world.get_settings()
+        settings.synchronous_mode = True
+        settings.fixed_delta_seconds = self.fixed_delta
+        self.world.apply_settings(settings)
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(True)
+
+    def stop(self):
+        if self._settings is None:
+            return
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(False)
+        self.world.apply_settings(self._settings)
+        self._settings = None
+
+    def _wait_writer(self):
+        writer = self.sensor_manager.writer
+        start = time.time()
+        while writer.running and time.time() - start < self.timeout:
+            if all(stats['depth'] < self.high_water * stats['capacity'] for stats in writer.stats().values()):
+                break
+            time.sleep(0.001)
+        self.writer_wait += time.time() - start
+
+    def step(self):
+        """Advances one frame. Returns the frame id"""
+        if self.sensor_manager is not None:
+            self._wait_writer()
+        self.frame = self.world.tick()
+        if self.route_manager is not None:
+            self.route_manager.tick(self.target)
+        if self.sensor_manager is not None:
+            names = list(self.sensor_manager.workers)
+            missing = self.sensor_manager.frame_sync.wait(names, self.frame, self.timeout)
+            if missing:
+                self.late += 1
+                print("system : 프레임 %d 센서 데이터 대기 시간 초과 (%s)" % (self.frame, ', '.join(missing)))
+        self.steps += 1
+        return self.frame
+
+    def stats(self):
+        return {
+            'frame': self.frame,
+            'steps': self.steps,
+            'late': self.late,
+            'writer_wait': self.writer_wait,
+        }
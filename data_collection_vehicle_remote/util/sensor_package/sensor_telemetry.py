@@ -0,0 +1,108 @@
+import os
+import json
+import threading
+
+import numpy as np
+
+# 샘플 컬럼 (frame, timestamp 제외), 모두 float64
+IMU_COLUMNS = ('ax', 'ay', 'az', 'gx', 'gy', 'gz', 'compass')
+GNSS_COLUMNS = ('latitude', 'longitude', 'altitude')
+
+COLUMN_FORMAT = '%s.col'
+COLUMNS_FILE = 'columns.json'
+
+DEFAULT_CHUNK_ROWS = 4096
+
+
+def map_column(directory, name, dtype):
+    """Read only memory map of one column file (empty array for a column without samples)"""
+    path = os.path.join(directory, COLUMN_FORMAT % name)
+    dtype = np.dtype(dtype)
+    if os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+
+
+def read_telemetry(directory):
+    """
+    Opens a TelemetryLog directory -> {'frame': int64 array, 'timestamp': float64 array, column: float64 array}.
+    The columns are memory mapped, cut to the rows every column holds (a log closed mid write keeps whole rows).
+    """
+    with open(os.path.join(directory, COLUMNS_FILE)) as f:
+        columns = json.load(f)['columns']
+    arrays = [(name, map_column(directory, name, dtype)) for name, dtype in columns]
+    rows = min(len(array) for _, array in arrays)
+    return dict((name, array[:rows]) for name, array in arrays)
+
+
+# ==============================================================================
+# -- TelemetryLog --------------------------------------------------------------
+# ==============================================================================
+
+
+class TelemetryLog(object):
+    """Full rate log of a small fixed-size sensor sample (IMU, GNSS) in preallocated column buffers.
+
+    append() stores the frame, the simulation timestamp and the sample values into row n of preallocated
+    chunk_rows arrays. Whenever the chunk is full (and on flush/close) every column is appended to its own
+    file in directory (frame.col, timestamp.col, ax.col, ...), so a session log is read back per column with
+    read_telemetry() (or sensor_reader.TelemetryReader) without parsing.
+    """
+
+    def __init__(self, directory, columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._frame = np.zeros(chunk_rows, dtype=np.int64)
+        self._timestamp = np.zeros(chunk_rows, dtype=np.float64)
+        self._values = np.zeros((chunk_rows, len(self.columns)), dtype=np.float64)
+        self._count = 0
+        self.samples = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, COLUMNS_FILE), 'w') as f:
+            json.dump({'columns': [('frame', '<i8'), ('timestamp', '<f8')] +
+                                  [(name, '<f8') for name in self.columns]}, f)
+        self._files = [open(os.path.join(directory, COLUMN_FORMAT % name), 'ab')
+                       for name in ('frame', 'timestamp') + self.columns]
+
+    def append(self, frame, timestamp, values):
+        with self._lock:
+            if self._files is None:
+                return
+            n = self._count
+            self._frame[n] = frame
+            self._timestamp[n] = timestamp
+            self._values[n] = values
+            self._count = n + 1
+            self.samples += 1
+            if self._count == self.chunk_rows:
+                self._flush()
+
+    def _flush(self):
+        n = self._count
+        if n == 0:
+            return
+        self._files[0].write(self._frame[:n].tobytes())
+        self._files[1].write(self._timestamp[:n].tobytes())
+        # 행 단위 버퍼를 컬럼별로 기록 (열 복사 1회)
+        for column, f in enumerate(self._files[2:]):
+            f.write(self._values[:n, column].tobytes())
+        for f in self._files:
+            f.flush()
+        self._count = 0
+
+    def flush(self):
+        with self._lock:
+            if self._files is not None:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._files is None:
+                return
+            self._flush()
+            for f in self._files:
+                f.close()
+            self._files = None
@@ -0,0 +1,84 @@
+import threading
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import RingBuffer
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import DROP_OLDEST
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import ENQUEUED
+
+
+# ==============================================================================
+# -- SensorWorker --------------------------------------------------------------
+# ==============================================================================
+
+
+class SensorWorker(object):
+    """Runs the processing of one sensor (decoding, preview, submit) on its own thread.
+
+    wrap() returns the function handed to actor.listen(): it only stores the measurement in a small
+    RingBuffer and returns, so the CARLA callback thread is never held up by a slow sensor; the worker
+    thread calls the original callback. With DROP_OLDEST a worker that falls behind skips to the newest
+    measurements (counted in stats()['dropped']). With metrics (a sensor_metrics.SensorMetrics) every
+    measurement is counted on arrival, before it is queued; on_done(name, frame) is called once a
+    measurement was handled (sensor_sync.FrameSync.notify).
+    """
+
+    def __init__(self, name, capacity=4, policy=DROP_OLDEST, metrics=None, on_done=None):
+        self.name = name
+        self.metrics = metrics
+        self.on_done = on_done
+        self._buffer = RingBuffer(capacity, policy)
+        self._ready = threading.Semaphore(0)
+        self._thread = None
+        self._stopping = False
+        self.errors = 0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='SensorWorker-%s' % self.name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the thread after the queued measurements were processed"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._ready.release()
+        self._thread.join()
+        self._thread = None
+
+    def wrap(self, callback):
+        def enqueue(data):
+            if not self.running:
+                return
+            if self.metrics is not None:
+                self.metrics.on_callback(self.name, data.timestamp)
+            if self._buffer.put((callback, data)) == ENQUEUED:
+                self._ready.release()
+        return enqueue
+
+    def stats(self):
+        return self._buffer.stats()
+
+    def _run(self):
+        while True:
+            self._ready.acquire()
+            item = self._buffer.get()
+            if item is None:
+                if self._stopping:
+                    return
+                continue
+            callback, data = item
+            try:
+                callback(data)
+            except Exception as ex:
+                self.errors += 1
+                print("system : 센서 데이터 처리 실패 (%s) : %s" % (self.name, ex))
+            self._buffer.mark_written()
+            if self.on_done is not None:
+                self.on_done(self.name, data.frame)
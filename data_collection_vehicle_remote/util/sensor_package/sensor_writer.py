@@ -0,0 +1,407 @@
+import os
+import sys
+import errno
+import threading
+import multiprocessing
+import collections
+
+import numpy as np
+
+try:
+    import pygame
+except ImportError:
+    raise RuntimeError('cannot import pygame, make sure pygame package is installed')
+
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import RingBuffer
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import DROP_OLDEST
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import ENQUEUED
+from data_collection_vehicle_remote.util.sensor_package.sensor_buffer import REJECTED
+
+# FrameData 종류
+KIND_IMAGE = 'image'
+KIND_LIDAR = 'lidar'
+KIND_ARRAY = 'array'
+KIND_BUNDLE = 'bundle'
+KIND_RADAR = 'radar'
+KIND_DEPTH = 'depth'
+KIND_SEGMENTATION = 'segmentation'
+KIND_DVS = 'dvs'
+KIND_BEV = 'bev'
+
+
+# ==============================================================================
+# -- FrameData -----------------------------------------------------------------
+# ==============================================================================
+
+
+class FrameData(object):
+    """Copy of a sensor measurement that stays valid after the CARLA callback returns"""
+
+    def __init__(self, sensor_id, kind, frame, timestamp, buffer, shape, dtype, path=None, streams=None):
+        self.sensor_id = str(sensor_id)
+        self.kind = kind
+        self.frame = frame
+        self.timestamp = timestamp
+        self.buffer = buffer
+        self.shape = tuple(shape)
+        # 구조체 dtype (DVS 이벤트 등) 의 필드가 유지되도록 dtype 객체로 보관
+        self.dtype = np.dtype(dtype)
+        # KIND_BUNDLE 인 경우 {stream_id: FrameData}
+        self.streams = streams
+        # 저장 경로 (root 기준 상대경로, 확장자 제외)
+        self.path = path if path is not None else os.path.join(self.sensor_id, '%08d' % frame)
+
+    def array(self):
+        """Returns a read only numpy view over the copied buffer"""
+        return np.frombuffer(self.buffer, dtype=np.dtype(self.dtype)).reshape(self.shape)
+
+    @property
+    def nbytes(self):
+        if self.streams is not None:
+            return sum(stream.nbytes for stream in self.streams.values())
+        return len(self.buffer)
+
+    @staticmethod
+    def from_image(image, sensor_id, path=None):
+        """carla.Image -> FrameData (BGRA uint8)"""
+        return FrameData(sensor_id, KIND_IMAGE, image.frame, image.timestamp, bytes(image.raw_data),
+                         (image.height, image.width, 4), np.uint8, path)
+
+    @staticmethod
+    def from_lidar(measurement, sensor_id, path=None):
+        """carla.LidarMeasurement -> FrameData (N x channels float32)"""
+        buffer = bytes(measurement.raw_data)
+        count = len(measurement)
+        channels = (len(buffer) // 4 // count) if count else 3
+        return FrameData(sensor_id, KIND_LIDAR, measurement.frame, measurement.timestamp, buffer,
+                         (count, channels), np.float32, path)
+
+    @staticmethod
+    def from_array(array, sensor_id, frame, timestamp, kind=KIND_ARRAY, path=None):
+        array = np.ascontiguousarray(array)
+        return FrameData(sensor_id, kind, frame, timestamp, array.tobytes(), array.shape, array.dtype, path)
+
+    @staticmethod
+    def from_bundle(streams, frame, timestamp, sensor_id='bundle', path=None):
+        """Groups the FrameData of several sensors taken at the same simulation frame"""
+        return FrameData(sensor_id, KIND_BUNDLE, frame, timestamp, b'', (0,), np.uint8, path, dict(streams))
+
+
+# ==============================================================================
+# -- Savers --------------------------------------------------------------------
+# ==============================================================================
+
+
+def _save_image(path, frame_data):
+    array = frame_data.array()
+    # BGRA -> RGB, pygame 은 (width, height) 순서를 사용함.
+    surface = pygame.surfarray.make_surface(array[:, :, 2::-1].swapaxes(0, 1))
+    pygame.image.save(surface, path + '.png')
+
+
+def _save_lidar(path, frame_data):
+    points = frame_data.array()
+    names = ('x', 'y', 'z', 'intensity')[:points.shape[1]]
+    header = ['ply',
+              'format binary_%s_endian 1.0' % sys.byteorder,
+              'element vertex %d' % points.shape[0]]
+    header += ['property float32 %s' % name for name in names]
+    header.append('end_header\n')
+    with open(path + '.ply', 'wb') as f:
+        f.write('\n'.join(header).encode('ascii'))
+        f.write(points.tobytes())
+
+
+def _save_array(path, frame_data):
+    np.save(path + '.npy', frame_data.array())
+
+
+def _save_bundle(path, frame_data):
+    # 한번의 쓰기로 동일 프레임의 모든 센서 데이터를 저장
+    arrays = dict((stream_id, stream.array()) for stream_id, stream in frame_data.streams.items())
+    np.savez(path + '.npz',
+             __frame__=np.int64(frame_data.frame),
+             __timestamp__=np.float64(frame_data.timestamp),
+             **arrays)
+
+
+SAVERS = {
+    KIND_IMAGE: _save_image,
+    KIND_LIDAR: _save_lidar,
+    KIND_ARRAY: _save_array,
+    KIND_BUNDLE: _save_bundle,
+}
+
+
+def write_frame(root, frame_data):
+    """Writes a single FrameData below root. Module level so it can run inside a worker process"""
+    path = os.path.join(root, frame_data.path)
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    SAVERS.get(frame_data.kind, _save_array)(path, frame_data)
+    return frame_data.nbytes
+
+
+def write_encoded(root, frame_data, encoder):
+    """Writes a single frame encoded by encoder (sensor_encoder.ImageEncoder)"""
+    path = os.path.join(root, frame_data.path)
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    data = encoder.encode(frame_data.array())
+    with open(path + encoder.extension, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+# ==============================================================================
+# -- FrameWriter ---------------------------------------------------------------
+# ==============================================================================
+
+
+class FrameWriter(object):
+    """Persists FrameData off the sensor callback thread.
+
+    Callbacks only copy the raw buffer and call submit(). Every sensor gets its own bounded RingBuffer
+    (see sensor_buffer) which a pool of writer threads drains round robin; with processes > 0 the threads
+    hand the actual encoding/writing to a process pool so it no longer competes with the callbacks for
+    the GIL.
+    """
+
+    def __init__(self, root='sensor', workers=2, capacity=64, policy=DROP_OLDEST, processes=0):
+        self.root = root
+        self.workers = max(1, workers)
+        self.capacity = capacity
+        self.policy = policy
+        self.processes = processes
+
+        self._buffers = collections.OrderedDict()
+        self._buffer_config = {}
+        self._threads = []
+        self._pool = None
+        self._stopping = False
+        self._next_index = 0
+        self._ready = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._store_factories = {}
+        self._stores = {}
+        # 카메라 이미지 인코딩 단계 (sensor_encoder.ImageEncoder), None 인 경우 pygame PNG 저장
+        self.encoder = None
+        # 기록된 프레임의 위치를 남기는 세션 인덱스 (sensor_manifest.SessionManifest)
+        self.manifest = None
+        # 센서별 기록 주기 조절 (sensor_rate.RateController), None 인 경우 모든 프레임 기록
+        self.rate_controller = None
+        # 저장 용량 관리 (sensor_storage.StorageManager), 용량 부족 시 프레임을 받지 않음
+        self.storage = None
+        self.errors = 0
+
+    @property
+    def running(self):
+        return len(self._threads) > 0
+
+    def start(self):
+        """Starts the writer threads (and process pool). Does nothing if already running"""
+        if self.running:
+            return
+        self._stopping = False
+        if self.processes > 0:
+            self._pool = multiprocessing.Pool(self.processes)
+        if self.encoder is not None:
+            self.encoder.start()
+        self._start_threads()
+
+    def _start_threads(self):
+        for n in range(len(self._threads), self.workers):
+            th = threading.Thread(target=self._run, name='FrameWriter-%d' % n)
+            th.daemon = True
+            th.start()
+            self._threads.append(th)
+
+    def set_encoder(self, encoder=None):
+        """Encodes KIND_IMAGE frames with encoder (an ImageEncoder) instead of the pygame PNG saver.
+
+        May be called while the writer is idle between sessions (no frames submitted): the queued frames are
+        written with the previous encoder, which is then stopped, and the open stores are closed so the image
+        stores of the next session are created with the new encoder. Each writer thread waits for one encoded
+        frame at a time, so the number of threads is raised to the encoder processes.
+        """
+        self.flush()
+        previous, self.encoder = self.encoder, encoder
+        self._close_stores()
+        if previous is not None and previous is not encoder:
+            previous.stop()
+        if encoder is not None:
+            self.workers = max(self.workers, encoder.processes)
+            if self.running:
+                encoder.start()
+                self._start_threads()
+
+    def register_store(self, kind, factory):
+        """Routes every FrameData of kind to store.append() instead of one file per frame.
+
+        factory(root, sensor_id) creates the store (an object with append(frame_data) -> nbytes and
+        close()) the first time a sensor submits a frame of that kind.
+        """
+        with self._lock:
+            self._store_factories[kind] = factory
+
+    def unregister_store(self, kind):
+        with self._lock:
+            self._store_factories.pop(kind, None)
+
+    def configure_buffer(self, sensor_id, capacity=None, policy=None):
+        """Sets capacity/policy of a sensor buffer. Takes effect when the buffer is (re)created"""
+        with self._lock:
+            self._buffer_config[str(sensor_id)] = (capacity or self.capacity, policy or self.policy)
+            buffer = self._buffers.get(str(sensor_id))
+            if buffer is not None and len(buffer) == 0:
+                del self._buffers[str(sensor_id)]
+
+    def buffer(self, sensor_id):
+        """Returns the ring buffer of a sensor, creating it on first use"""
+        sensor_id = str(sensor_id)
+        buffer = self._buffers.get(sensor_id)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(sensor_id)
+                if buffer is None:
+                    capacity, policy = self._buffer_config.get(sensor_id, (self.capacity, self.policy))
+                    buffer = RingBuffer(capacity, policy)
+                    self._buffers[sensor_id] = buffer
+        return buffer
+
+    def submit(self, frame_data, timeout=None):
+        """Queues a frame for writing. Returns False when the frame itself was dropped"""
+        if not self.running:
+            return False
+        storage = self.storage
+        if storage is not None:
+            storage.poll(self.stats)
+            if not storage.admit():
+                return False
+        controller = self.rate_controller
+        if controller is not None:
+            controller.poll(self.stats)
+            if not controller.admit(frame_data.sensor_id, frame_data.timestamp):
+                # 목표 주기에 맞춰 건너뛴 프레임은 손실로 보지 않음
+                return True
+        result = self.buffer(frame_data.sensor_id).put(frame_data, timeout)
+        if result == ENQUEUED:
+            with self._lock:
+                self._pending += 1
+            self._ready.release()
+        return result != REJECTED
+
+    def qsize(self):
+        return sum(len(buffer) for buffer in list(self._buffers.values()))
+
+    def stats(self):
+        """Per sensor counters: {sensor_id: {depth, enqueued, dropped, written, ...}}"""
+        return dict((sensor_id, buffer.stats()) for sensor_id, buffer in list(self._buffers.items()))
+
+    def flush(self):
+        """Blocks until every queued frame has been written"""
+        with self._idle:
+            while self._pending > 0 and self.running:
+                self._idle.wait(0.1)
+
+    def stop(self):
+        """Flushes the buffers and shuts the worker threads and processes down"""
+        if not self.running:
+            return
+        self.flush()
+        self._stopping = True
+        for _ in self._threads:
+            self._ready.release()
+        for th in self._threads:
+            th.join()
+        self._threads = []
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self.encoder is not None:
+            self.encoder.stop()
+        self._close_stores()
+
+    def set_root(self, root):
+        """Writes the following frames below root (e.g. a new session directory), closing the open stores"""
+        self.flush()
+        self._close_stores()
+        self.root = root
+
+    def _close_stores(self):
+        with self._lock:
+            stores = list(self._stores.values())
+            self._stores = {}
+        for store in stores:
+            store.close()
+
+    def _next(self):
+        """Round robin over the sensor buffers so one busy sensor cannot starve the others"""
+        with self._lock:
+            buffers = list(self._buffers.values())
+            start = self._next_index
+            self._next_index += 1
+        for n in range(len(buffers)):
+            buffer = buffers[(start + n) % len(buffers)]
+            frame_data = buffer.get()
+            if frame_data is not None:
+                return buffer, frame_data
+        return None, None
+
+    def _store(self, frame_data):
+        key = (frame_data.kind, frame_data.sensor_id)
+        store = self._stores.get(key)
+        if store is None:
+            with self._lock:
+                store = self._stores.get(key)
+                if store is None:
+                    store = self._store_factories[frame_data.kind](self.root, frame_data.sensor_id)
+                    self._stores[key] = store
+        return store
+
+    def _write(self, frame_data):
+        if frame_data.kind in self._store_factories:
+            # 샤드 저장소는 파일 핸들을 유지하므로 writer 스레드에서 기록
+            store = self._store(frame_data)
+            nbytes = store.append(frame_data)
+            if self.manifest is not None:
+                path, offset = store.shards.last_location
+                self.manifest.add_frame(frame_data, os.path.relpath(path, self.root), offset, nbytes)
+            return nbytes
+        path = frame_data.path
+        if frame_data.kind == KIND_IMAGE and self.encoder is not None:
+            nbytes = write_encoded(self.root, frame_data, self.encoder)
+            path += self.encoder.extension
+        elif self._pool is not None:
+            nbytes = self._pool.apply(write_frame, (self.root, frame_data))
+        else:
+            nbytes = write_frame(self.root, frame_data)
+        if self.manifest is not None:
+            self.manifest.add_frame(frame_data, path, 0, nbytes)
+        return nbytes
+
+    def _run(self):
+        while True:
+            self._ready.acquire()
+            buffer, frame_data = self._next()
+            if frame_data is None:
+                if self._stopping:
+                    return
+                continue
+            try:
+                buffer.mark_written(self._write(frame_data))
+            except Exception as ex:
+                with self._lock:
+                    self.errors += 1
+                print("system : 센서 데이터 저장 실패 (%s) : %s" % (frame_data.path, ex))
+                if self.storage is not None and isinstance(ex, OSError) and ex.errno == errno.ENOSPC:
+                    self.storage.pause()
+            finally:
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
@@ -13,6 +13,13 @@ import datetime
 from environment_config_remote.blueprintAttribute import ActorData_Manager
 from environment_config_remote.Data.weather_data import UI_DATA
 import environment_config_remote.Data.ui_input_module as ui
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import FrameData
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import FrameWriter
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_IMAGE
+from data_collection_vehicle_remote.util.sensor_package.sensor_writer import KIND_LIDAR
+from data_collection_vehicle_remote.util.sensor_package.sensor_lidar import LidarStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_encoder import ImageStore
+from data_collection_vehicle_remote.util.sensor_package.sensor_worker import SensorWorker
 from PyQt5.QtWidgets import *
 from PyQt5 import uic
 
@@ -46,12 +53,13 @@ form_class = uic.loadUiType("environment_config_remote/Carla_UI.ui")[0]
 
 
 class Sensor_Lidar(object):
-    def __init__(self, world, target, config):
+    def __init__(self, world, target, config, worker=None):
         self.world = world
         self.bp_library = world.get_blueprint_library()
         self.target = target
         self.sensorActor = None
         self.recording = False
+        self.writer = None
         self.surface = None  # <- 2020-08-07추가
         self.dim = (config.width, config.height)
 
@@ -69,11 +77,14 @@ class Sensor_Lidar(object):
 
         sensor = self.world.spawn_actor(bp, self.sensor_position, attach_to=self.target)
         weak_self = weakref.ref(self)
-        sensor.listen(lambda point_cloud: Sensor_Lidar._parse_image(weak_self, point_cloud, item[1]))
+        callback = lambda point_cloud: Sensor_Lidar._parse_image(weak_self, point_cloud, item[1])
+        # worker 가 설정된 경우 처리는 센서별 worker 스레드에서 수행
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
@@ -103,7 +114,11 @@ class Sensor_Lidar(object):
             simulation_time = image.timestamp
             time = datetime.timedelta(seconds=int(simulation_time))
             time = str(time).replace(':', '-')
-            image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
+            if self.writer is not None:
+                path = os.path.join(str(id), time, '%08d' % image.frame)
+                self.writer.submit(FrameData.from_lidar(image, id, path))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
 
     def render(self, display):  # <- 2020-08-07추가
         if self.surface is not None:
@@ -111,12 +126,13 @@ class Sensor_Lidar(object):
 
 
 class Camera_Depth(object):
-    def __init__(self, world, target, config):
+    def __init__(self, world, target, config, worker=None):
         self.world = world
         self.bp_library = world.get_blueprint_library()
         self.target = target
         self.sensorActor = None
         self.recording = False
+        self.writer = None
         self.surface = None
 
         self.sensor_option = config.sensor_option
@@ -130,11 +146,13 @@ class Camera_Depth(object):
 
         sensor = self.world.spawn_actor(bp, self.sensor_position, attach_to=self.target)
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Depth._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Depth._parse_image(weak_self, image, item[1], item[3])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
@@ -167,7 +185,11 @@ class Camera_Depth(object):
             simulation_time = image.timestamp
             time = datetime.timedelta(seconds=int(simulation_time))
             time = str(time).replace(':', '-')
-            image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
+            if self.writer is not None:
+                path = os.path.join(str(id), time, '%08d' % image.frame)
+                self.writer.submit(FrameData.from_image(image, id, path))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
 
     def render(self, display):
         if self.surface is not None:
@@ -175,12 +197,13 @@ class Camera_Depth(object):
 
 
 class Camera_Rgb(object):
-    def __init__(self, world, target, config):
+    def __init__(self, world, target, config, worker=None):
         self.world = world
         self.bp_library = world.get_blueprint_library()
         self.target = target
         self.sensorActor = None
         self.recording = False
+        self.writer = None
         self.surface = None
 
         self.sensor_option = config.sensor_option
@@ -194,11 +217,13 @@ class Camera_Rgb(object):
 
         sensor = self.world.spawn_actor(bp, self.sensor_position, attach_to=self.target)
         weak_self = weakref.ref(self)
-        sensor.listen(lambda image: Camera_Rgb._parse_image(weak_self, image, item[1], item[3]))
+        callback = lambda image: Camera_Rgb._parse_image(weak_self, image, item[1], item[3])
+        sensor.listen(worker.wrap(callback) if worker is not None else callback)
         self.sensorActor = sensor  # 설정된 센서 저장.
 
-    def set_recording(self, check=False):
+    def set_recording(self, check=False, writer=None):
         self.recording = check
+        self.writer = writer
 
     def destroy(self):  # target 센서 제거.
         self.sensorActor.destroy()
@@ -221,7 +246,11 @@ class Camera_Rgb(object):
             simulation_time = image.timestamp
             time = datetime.timedelta(seconds=int(simulation_time))
             time = str(time).replace(':', '-')
-            image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
+            if self.writer is not None:
+                path = os.path.join(str(id), time, '%08d' % image.frame)
+                self.writer.submit(FrameData.from_image(image, id, path))
+            else:
+                image.save_to_disk('sensor/' + str(id) + '/%s' % time + '/%08d' % image.frame)
 
     # PyGame 파트 ///////////////////////////////////
     # @staticmethod
@@ -246,46 +275,61 @@ class Sensor_Manager(Camera_Rgb, Camera_Depth, Sensor_Lidar):
         self.target = target
         self.args = config
         self.sensor = None
+        # select_sensor 로 추가한 모든 센서, 함께 녹화/종료됨
+        self.sensors = []
+        self.workers = []
         self.recoding_check = False
         self.radar_sensor = None
         self.sensor_imu = None
         self.sensor_gnss = None
+        self.writer = FrameWriter(root='sensor')
+        # 라이다와 카메라 이미지는 프레임별 파일(초 단위 폴더) 대신 샤드 파일에 기록
+        self.writer.register_store(KIND_LIDAR, LidarStore)
+        self.writer.register_store(KIND_IMAGE, ImageStore)
 
     def set_recording(self, check=False):
-        self.sensor.set_recording(self.recoding_check)
+        for sensor in self.sensors:
+            sensor.set_recording(self.recoding_check, self.writer)
 
     def recording(self):
         if self.recoding_check is False:
             self.recoding_check = True
+            self.writer.start()
             print("녹화시작")
         elif self.recoding_check is True:
             self.recoding_check = False
             print("녹화종료")
-        self.sensor.set_recording(self.recoding_check)
+        for sensor in self.sensors:
+            sensor.set_recording(self.recoding_check, self.writer)
+        if self.recoding_check is False:
+            # 녹화 종료 시 큐에 남은 프레임을 모두 기록함.
+            self.writer.flush()
 
     def select_sensor(self, index=-1, sensor_option=None, sensor_position=None):
+        """호출할 때마다 센서를 하나씩 추가함"""
         self.args.sensor_option = sensor_option
         self.args.sensor_position = sensor_position
-        if self.sensor is None:
-            if index == -1:
-                print("sensor Camera_Rgb")
-                self.sensor = Camera_Rgb(self.world, self.target, self.args)
-            elif index == 0:
-                print("sensor Camera_Rgb")
-                self.sensor = Camera_Rgb(self.world, self.target, self.args)
-            elif index == 1:
-                print("sensor Camera_Depth")
-                self.sensor = Camera_Depth(self.world, self.target, self.args)
-            elif index == 2:
-                print("sensor Lidar")
-                self.sensor = Sensor_Lidar(self.world, self.target, self.args)
-
-            return self.sensor
+        worker = SensorWorker(str(len(self.sensors)))
+        worker.start()
+        if index == 1:
+            print("sensor Camera_Depth")
+            self.sensor = Camera_Depth(self.world, self.target, self.args, worker)
+        elif index == 2:
+            print("sensor Lidar")
+            self.sensor = Sensor_Lidar(self.world, self.target, self.args, worker)
         else:
-            return self.sensor
+            print("sensor Camera_Rgb")
+            self.sensor = Camera_Rgb(self.world, self.target, self.args, worker)
+        self.sensor.set_recording(self.recoding_check, self.writer)
+        self.sensors.append(self.sensor)
+        self.workers.append(worker)
+        return self.sensor
 
     def destroy(self):
-        self.sensor.destroy()
+        for sensor in self.sensors:
+            sensor.destroy()
+        for worker in self.workers:
+            worker.stop()
         if self.radar_sensor is not None:
             self.radar_sensor.destroy()
         if self.sensor_imu is not None:
@@ -294,6 +338,9 @@ class Sensor_Manager(Camera_Rgb, Camera_Depth, Sensor_Lidar):
             self.sensor_gnss.destroy()
         self.radar_sensor = None
         self.sensor = None
+        self.sensors = []
+        self.workers = []
+        self.writer.stop()
 
 
 class NPC_Manager(object):
@@ -707,7 +754,9 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
             sensor_yaw = float(self.lineEdit_Rotation_Yaw.text())
             print(X, Y, Fov, sensor_x, sensor_y, sensor_z, sensor_roll, sensor_pitch, sensor_yaw)
 
-            self._sensor = Sensor_Manager(self.world, self.target, self.args)
+            if self._sensor is None:
+                self._sensor = Sensor_Manager(self.world, self.target, self.args)
+                self._sensor_list.append(self._sensor)
             self.sensor_option = ['sensor.camera.depth', cc.Raw, 'Camera Depth', 'depth' + str(self.sensor_count), {
                 'image_size_x': str(X),
                 'image_size_y': str(Y),
@@ -717,7 +766,6 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
                                                    carla.Rotation(roll=sensor_roll, pitch=sensor_pitch, yaw=sensor_yaw))
 
             self._sensor.select_sensor(1, self.sensor_option, self.sensor_position)
-            self._sensor_list.append(self._sensor)
             self.sensor_count = self.sensor_count + 1
 
 
@@ -739,7 +787,9 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
             sensor_yaw = float(self.lineEdit_Rotation_Yaw.text())
             print(channels, range, points_per_second, rotation_frequency, upper_fov, lower_fov, sensor_tick)
 
-            self._sensor = Sensor_Manager(self.world, self.target, self.args)
+            if self._sensor is None:
+                self._sensor = Sensor_Manager(self.world, self.target, self.args)
+                self._sensor_list.append(self._sensor)
             self.sensor_option = ['sensor.lidar.ray_cast', 'lidar' + str(self.sensor_count), {
                 'channels': str(channels),
                 'range': str(range),
@@ -753,7 +803,6 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
                                                    carla.Rotation(roll=sensor_roll, pitch=sensor_pitch, yaw=sensor_yaw))
 
             self._sensor.select_sensor(2, self.sensor_option, self.sensor_position)
-            self._sensor_list.append(self._sensor)
             self.sensor_count = self.sensor_count + 1
 
         else:
@@ -770,7 +819,9 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
             sensor_yaw = float(self.lineEdit_Rotation_Yaw.text())
             print(X, Y, Fov, sensor_x, sensor_y, sensor_z, sensor_roll, sensor_pitch, sensor_yaw)
 
-            self._sensor = Sensor_Manager(self.world, self.target, self.args)
+            if self._sensor is None:
+                self._sensor = Sensor_Manager(self.world, self.target, self.args)
+                self._sensor_list.append(self._sensor)
             self.sensor_option = ['sensor.camera.rgb', cc.Raw, 'Camera RGB', 'rgb' + str(self.sensor_count), {
                 'image_size_x': str(X),
                 'image_size_y': str(Y),
@@ -780,7 +831,6 @@ class WindowClass(QMainWindow, form_class, NPC_Manager, Sensor_Manager, Weather_
                                                    carla.Rotation(roll=sensor_roll, pitch=sensor_pitch, yaw=sensor_yaw))
 
             self._sensor.select_sensor(0, self.sensor_option, self.sensor_position)
-            self._sensor_list.append(self._sensor)
             self.sensor_count = self.sensor_count + 1
 
     def Sensor_Play(self):